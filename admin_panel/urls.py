@@ -43,4 +43,9 @@ urlpatterns = [
     path('subjects/delete/<int:pk>/', views.delete_subject, name='delete_subject'),
     path('assign_subject/<int:subject_id>/', views.assign_subject_to_courses, name='assign_subject_to_courses'),
     path('subjects/assign-instructor/<int:subject_id>/', views.assign_instructor_to_course, name='assign_instructor_to_course'),
+
+    # Request profiles
+    path('profiles/', views.profiles, name='profiles'),
+    path('profiles/<str:capture_id>/', views.profile_detail, name='profile_detail'),
+    path('profiles/<str:capture_id>/download/', views.profile_download, name='profile_download'),
 ]
@@ -1,9 +1,18 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth import logout
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.conf import settings as django_settings
+from django.http import Http404, FileResponse
+from urllib.parse import urlencode
 from random import sample
 from .models import AboutSection, PortalSettings
+from core.db_router import read_replica
+from core.site_config import get_site_config
+from core.uploads import add_upload_errors
+from core.profiling import (
+    PROFILE_PARAM, PROFILE_HEADER, make_profile_token, list_captures, get_capture, capture_stats_path,
+)
 from student_portal.models import StudentProfile, Subject, CourseSubject, Semester
 from instructor_portal.models import InstructorProfile
 from core.models import School, Department, Course
@@ -16,6 +25,7 @@ from .forms import (
 
 
 @login_required(login_url='/admin_panel/login/')
+@read_replica()
 def dashboard(request):
     if request.session.get("portal") != "admin":
         logout(request)
@@ -30,8 +40,7 @@ def dashboard(request):
     students = sample(students_qs, min(len(students_qs), 3))
     instructors = sample(instructors_qs, min(len(instructors_qs), 3))
     
-    about_sections = AboutSection.objects.all()
-    settings = PortalSettings.objects.first() or PortalSettings.objects.create()
+    site_config = get_site_config()
     
     total_students = StudentProfile.objects.count()
     total_instructors = InstructorProfile.objects.count()
@@ -53,8 +62,8 @@ def dashboard(request):
     context = {
         'students': students,
         'instructors': instructors,
-        'about_sections': about_sections,
-        'settings': settings,
+        'about_sections': site_config.about_sections,
+        'settings': site_config.portal,
         'total_students': total_students,
         'total_instructors': total_instructors,
         'subject_labels': json.dumps(subject_labels),
@@ -78,6 +87,7 @@ def register_student(request):
 def register_instructor(request):
     if request.method == 'POST':
         form = InstructorRegistrationForm(request.POST, request.FILES)
+        add_upload_errors(request, form)
         if form.is_valid():
             instructor = form.save()
             messages.success(request, f"Instructor {instructor.full_name} registered successfully!")
@@ -130,6 +140,7 @@ def edit_student(request, student_id):
 
     if request.method == "POST":
         form = StudentEditForm(request.POST, request.FILES, instance=student)
+        add_upload_errors(request, form)
         if form.is_valid():
             form.save()
             messages.success(request, "Student updated successfully.")
@@ -161,6 +172,7 @@ def edit_instructor(request, pk):
 
     if request.method == 'POST':
         form = InstructorEditForm(request.POST, request.FILES, instance=instructor)
+        add_upload_errors(request, form)
         if form.is_valid():
             form.save()
             messages.success(request, "Instructor updated successfully.")
@@ -409,3 +421,44 @@ def assign_instructor_to_course(request, subject_id):
         'course_subjects': course_subjects,
         'instructors': instructors,
     })
+
+
+# -------- Request Profiles ----------
+@login_required(login_url='/admin_panel/login/')
+@user_passes_test(lambda u: u.is_staff, login_url='/admin_panel/login/')
+def profiles(request):
+    profile_link = None
+    if request.method == 'POST':
+        # A link that profiles the given page for whoever opens it
+        path = request.POST.get('path') or '/'
+        if not path.startswith('/'):
+            path = '/' + path
+        token = make_profile_token(request.user)
+        separator = '&' if '?' in path else '?'
+        profile_link = {
+            'url': request.build_absolute_uri(f'{path}{separator}{urlencode({PROFILE_PARAM: token})}'),
+            'header': f'{PROFILE_HEADER}: {token}',
+            'minutes': django_settings.PROFILE_TOKEN_MAX_AGE // 60,
+        }
+    return render(request, 'admin_panel/profiles.html', {
+        'captures': list_captures(),
+        'profile_link': profile_link,
+    })
+
+
+@login_required(login_url='/admin_panel/login/')
+@user_passes_test(lambda u: u.is_staff, login_url='/admin_panel/login/')
+def profile_detail(request, capture_id):
+    capture = get_capture(capture_id)
+    if capture is None:
+        raise Http404("Profile not found.")
+    return render(request, 'admin_panel/profile_detail.html', {'capture': capture})
+
+
+@login_required(login_url='/admin_panel/login/')
+@user_passes_test(lambda u: u.is_staff, login_url='/admin_panel/login/')
+def profile_download(request, capture_id):
+    path = capture_stats_path(capture_id)
+    if path is None:
+        raise Http404("Profile not found.")
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'{capture_id}.prof')
@@ -1,9 +1,23 @@
 from django.contrib import admin
-from .models import Course, ContactInfo, EnrollmentApplication, School, Department, ContactMessage
+from .models import Course, ContactInfo, EnrollmentApplication, School, Department, ContactMessage, SlowQuery, OutboundEmail
 
 admin.site.register(Course)
 admin.site.register(ContactInfo)
 admin.site.register(ContactMessage)
 admin.site.register(EnrollmentApplication)
 admin.site.register(School)
-admin.site.register(Department)
\ No newline at end of file
+admin.site.register(Department)
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'duration_ms', 'view', 'caller', 'fingerprint')
+    list_filter = ('view',)
+    search_fields = ('normalized_sql', 'caller', 'fingerprint')
+    readonly_fields = [f.name for f in SlowQuery._meta.fields]
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'to', 'subject', 'sent_at', 'attempts')
+    list_filter = ('sent_at',)
+    search_fields = ('to', 'subject', 'key')
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.conf import settings
+        from .storage import configure_cloudinary
+        configure_cloudinary()
+        from . import site_config, portal_identity  # noqa: F401 (connect the invalidation signals)
+        if settings.PERF_INSTRUMENTATION:
+            from . import perf
+            perf.install()
@@ -0,0 +1,165 @@
+"""
+Two-level cache with namespaced, versioned keys.
+
+``CACHES['default']`` is a TieredCache: the per-process local-memory cache
+``local`` (L1) in front of ``shared`` (L2), which is Redis when
+CACHE_REDIS_URL is set and files under CACHE_DIR otherwise. L1 copies live
+at most CACHE_L1_SECONDS, so a change made by another process shows up
+within that time.
+
+Features cache through a CacheNamespace::
+
+    SEMESTER_CACHE = CacheNamespace('semester', timeout=300)
+    semester = SEMESTER_CACHE.get_or_set('current', load_current_semester)
+
+Keys look like ``<namespace>:<generation>:<key>``. ``invalidate()`` bumps
+the generation, which drops every key of the namespace at once. When a
+value is missing, ``get_or_set`` lets one caller compute it while the
+others wait up to CACHE_LOCK_WAIT_SECONDS for the result (stampede
+protection). Hits and misses are counted per namespace in core.metrics.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.utils.functional import cached_property
+
+from .metrics import record_cache
+
+
+MISSING = object()
+
+
+class TieredCache(BaseCache):
+    """Reads L1 then L2, filling L1 on an L2 hit; writes go to both."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l1_alias = options.get('L1', 'local')
+        self.l2_alias = options.get('L2', 'shared')
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+
+    @cached_property
+    def l1(self):
+        return caches[self.l1_alias]
+
+    @cached_property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    def _l1_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None or timeout > self.l1_timeout:
+            return self.l1_timeout
+        return timeout
+
+    def get(self, key, default=None, version=None):
+        value = self.l1.get(key, MISSING, version=version)
+        if value is MISSING:
+            value = self.l2.get(key, MISSING, version=version)
+            if value is MISSING:
+                return default
+            self.l1.set(key, value, self.l1_timeout, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout, version=version)
+        self.l1.set(key, value, self._l1_timeout(timeout), version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.l2.add(key, value, timeout, version=version)
+        if added:
+            self.l1.set(key, value, self._l1_timeout(timeout), version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l1.delete(key, version=version)
+        return self.l2.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.l1.delete(key, version=version)
+        return self.l2.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        return self.l1.has_key(key, version=version) or self.l2.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.l1.delete(key, version=version)
+        return self.l2.incr(key, delta, version=version)
+
+    def clear(self):
+        self.l1.clear()
+        self.l2.clear()
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
+
+
+class CacheNamespace:
+
+    def __init__(self, name, timeout=DEFAULT_TIMEOUT):
+        self.name = name
+        self.timeout = timeout
+
+    @property
+    def generation_key(self):
+        return f'{self.name}:generation'
+
+    def generation(self):
+        generation = cache.get(self.generation_key)
+        if generation is None:
+            # Start from the clock, not 1, so an evicted counter cannot revive old keys
+            cache.add(self.generation_key, time.time_ns(), None)
+            generation = cache.get(self.generation_key)
+        return generation
+
+    def key(self, key):
+        return f'{self.name}:{self.generation()}:{key}'
+
+    def get(self, key, default=None):
+        value = cache.get(self.key(key), MISSING)
+        record_cache(self.name, value is not MISSING)
+        return default if value is MISSING else value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        cache.set(self.key(key), value, self.timeout if timeout is DEFAULT_TIMEOUT else timeout)
+
+    def delete(self, key):
+        cache.delete(self.key(key))
+
+    def invalidate(self):
+        """Drop every key of the namespace."""
+        try:
+            cache.incr(self.generation_key)
+        except ValueError:
+            pass  # no generation yet, so nothing is cached under one
+
+    def get_or_set(self, key, compute, timeout=DEFAULT_TIMEOUT):
+        """
+        The cached value of ``key``, computing and storing it with
+        ``compute()`` when missing. ``None`` is a valid cached value.
+        """
+        full_key = self.key(key)
+        value = cache.get(full_key, MISSING)
+        record_cache(self.name, value is not MISSING)
+        if value is not MISSING:
+            return value
+
+        lock_key = f'{full_key}:lock'
+        locked = cache.add(lock_key, 1, settings.CACHE_LOCK_SECONDS)
+        if not locked:
+            # Someone else is computing it; wait for their result before doing the work twice
+            deadline = time.monotonic() + settings.CACHE_LOCK_WAIT_SECONDS
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                value = cache.get(full_key, MISSING)
+                if value is not MISSING:
+                    return value
+        try:
+            value = compute()
+            cache.set(full_key, value, self.timeout if timeout is DEFAULT_TIMEOUT else timeout)
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        return value
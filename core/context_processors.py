@@ -0,0 +1,8 @@
+from django.utils.functional import SimpleLazyObject
+
+from .site_config import get_site_config
+
+
+def site_config(request):
+    """The cached SiteConfig as ``site_config``, loaded only if a template uses it"""
+    return {'site_config': SimpleLazyObject(get_site_config)}
@@ -0,0 +1,104 @@
+"""
+Read-replica routing.
+
+Reads go to the primary unless a block of code opts in with ``read_replica``
+(usable as a context manager or decorator), so only designated heavy
+read-only workloads (dashboards, monitoring, reports) hit the replica.
+
+Read-your-writes: a request that writes (any non-GET/HEAD/OPTIONS method) or
+that follows a write within REPLICA_PIN_SECONDS is pinned to the primary, as
+is any code after a write in the same context.
+"""
+import time
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE_NAME = 'siat_pin_primary'
+
+_use_replica = ContextVar('use_replica', default=False)
+_pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+class read_replica(ContextDecorator):
+    """
+    Send ORM reads in this block to the replica.
+
+        @read_replica()
+        def dashboard(request): ...
+
+        with read_replica():
+            rows = list(Submission.objects.values(...))
+    """
+
+    def _recreate_cm(self):
+        # A decorated view shares one instance across threads; each call needs its own token
+        return type(self)()
+
+    def __enter__(self):
+        self._token = _use_replica.set(True)
+        return self
+
+    def __exit__(self, *exc):
+        _use_replica.reset(self._token)
+        return False
+
+
+def pin_to_primary():
+    _pinned_to_primary.set(True)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and not _pinned_to_primary.get() and replica_configured():
+            return REPLICA_ALIAS
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        # Anything read after this write in the same context must see it
+        pin_to_primary()
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    """
+    Pins writing requests, and requests shortly after one, to the primary
+    so a user never reads data older than their own last write.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writing = request.method not in ('GET', 'HEAD', 'OPTIONS')
+        try:
+            pinned_until = float(request.COOKIES.get(PIN_COOKIE_NAME, 0))
+        except ValueError:
+            pinned_until = 0
+
+        token = _pinned_to_primary.set(writing or pinned_until > time.time())
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned_to_primary.reset(token)
+
+        if writing and replica_configured():
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(PIN_COOKIE_NAME, str(time.time() + seconds), max_age=seconds,
+                                httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,34 @@
+from cloudinary.models import CloudinaryField
+from django.core.files.uploadedfile import UploadedFile
+
+from .perf import timed
+from .storage import get_media_storage, CloudinaryMediaStorage
+
+
+class MediaField(CloudinaryField):
+    """
+    CloudinaryField that uploads and builds URLs through the configured media
+    backend (see core.storage). The stored value keeps Cloudinary's
+    "<resource_type>/<type>/v<version>/<public_id>.<format>" format, so rows
+    are interchangeable between backends.
+    """
+
+    def parse_cloudinary_resource(self, value):
+        return get_media_storage().wrap(super().parse_cloudinary_resource(value))
+
+    def pre_save(self, model_instance, add):
+        storage = get_media_storage()
+        if isinstance(storage, CloudinaryMediaStorage):
+            # CloudinaryField uploads pending files itself
+            with timed('cloudinary'):
+                return super().pre_save(model_instance, add)
+
+        value = getattr(model_instance, self.attname)
+        if isinstance(value, UploadedFile):
+            options = {"type": self.type, "resource_type": self.resource_type}
+            options.update({key: val(model_instance) if callable(val) else val for key, val in self.options.items()})
+            result = storage.upload(value, **options)
+            instance_value = storage.resource(result, default_resource_type=self.resource_type)
+            setattr(model_instance, self.attname, instance_value)
+            return self.get_prep_value(instance_value)
+        return value
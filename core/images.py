@@ -0,0 +1,49 @@
+"""
+Responsive image derivatives.
+
+Course thumbnails and profile pictures are uploaded at whatever size the
+user had on disk. ``image_variants`` maps an image to width-bounded WebP or
+JPEG copies produced by the media backend (Cloudinary transformation URLs,
+or a Pillow pipeline for the local backend) so templates can emit srcset.
+"""
+import hashlib
+
+from django.conf import settings
+
+from .cache import CacheNamespace
+from .storage import get_media_storage
+
+
+VARIANT_FORMATS = ('webp', 'jpg')
+
+VARIANT_CACHE = CacheNamespace('image-variants', timeout=None)
+
+
+def image_widths():
+    return getattr(settings, 'RESPONSIVE_IMAGE_WIDTHS', [160, 320, 640, 1024])
+
+
+def image_variants(image, widths=None, format='webp'):
+    """
+    Return {width: url} for an image field value.
+
+    The map only depends on the stored value (public_id and version), so it is
+    cached indefinitely; a re-upload changes the value and therefore the key.
+    """
+    if not image or not getattr(image, 'public_id', None):
+        return {}
+    widths = sorted(widths or image_widths())
+    value = image.get_prep_value() or image.public_id
+    digest = hashlib.md5(f'{settings.MEDIA_BACKEND}:{value}'.encode()).hexdigest()
+    key = f"{digest}:{format}:{','.join(map(str, widths))}"
+
+    def build():
+        storage = get_media_storage()
+        return {width: storage.variant_url(image, width, format) for width in widths}
+
+    return VARIANT_CACHE.get_or_set(key, build)
+
+
+def srcset(variants):
+    """'url 160w, url 320w, ...' for a variants map"""
+    return ', '.join(f'{url} {width}w' for width, url in sorted(variants.items()))
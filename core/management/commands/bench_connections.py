@@ -0,0 +1,73 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_started, request_finished
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Measure per-request database connect cost with fresh vs persistent connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Simulated requests per mode')
+        parser.add_argument('--database', default='default', help='Database alias to benchmark')
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        connection = connections[alias]
+        configured_max_age = connection.settings_dict['CONN_MAX_AGE']
+        persistent_max_age = configured_max_age or 60
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Engine: {connection.settings_dict['ENGINE']}  Host: {connection.settings_dict['HOST'] or 'local socket'}"
+        ))
+
+        try:
+            results = [
+                ('Fresh connection per request (CONN_MAX_AGE=0)', self.run(connection, 0, options['requests'])),
+                (f'Persistent connection (CONN_MAX_AGE={persistent_max_age})',
+                 self.run(connection, persistent_max_age, options['requests'])),
+            ]
+        finally:
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'] = configured_max_age
+
+        self.stdout.write(f'\n{"Mode":<50} {"mean":>9} {"p50":>9} {"p95":>9} {"connects":>9}')
+        for label, (timings, connects) in results:
+            self.stdout.write(
+                f'{label:<50} {self.ms(statistics.mean(timings)):>9} {self.ms(statistics.median(timings)):>9} '
+                f'{self.ms(self.percentile(timings, 95)):>9} {connects:>9}'
+            )
+
+        fresh, persistent = (statistics.mean(timings) for _, (timings, _) in results)
+        self.stdout.write(self.style.SUCCESS(f'\nConnect overhead per request: {self.ms(fresh - persistent)}'))
+
+    def run(self, connection, max_age, count):
+        """
+        Replay the request lifecycle: request_started (which recycles old or
+        unhealthy connections), one cheap query, request_finished.
+        """
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        timings = []
+        connects = 0
+        for _ in range(count):
+            start = time.perf_counter()
+            request_started.send(sender=self.__class__)
+            if connection.connection is None:
+                connects += 1
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            request_finished.send(sender=self.__class__)
+            timings.append(time.perf_counter() - start)
+        return timings, connects
+
+    @staticmethod
+    def percentile(values, pct):
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+    @staticmethod
+    def ms(seconds):
+        return f'{seconds * 1000:.2f}ms'
@@ -0,0 +1,293 @@
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.urls import get_resolver, reverse, URLPattern, URLResolver
+from core import perf
+from core.models import Course, School, Department
+from core.profiling import list_captures
+from core.portal_identity import PROFILE_CACHE
+from core.site_config import SITE_CONFIG_CACHE
+from core.templatetags.fragment_cache import FRAGMENT_CACHE
+from instructor_portal.models import InstructorProfile
+from student_portal.models import (
+    StudentProfile, Enrollment, Semester, CourseSubject, Assignment,
+)
+from student_portal.semesters import SEMESTER_CACHE
+from admin_panel.models import AboutSection
+
+
+DEFAULT_BUDGET = Path(settings.BASE_DIR) / 'perf_budget.json'
+
+# Portal a namespace belongs to, and the seeded user that logs into it
+PORTALS = {
+    'student_portal': 'student',
+    'instructor_portal': 'instructor',
+    'admin_panel': 'admin',
+}
+
+# GET requests that log out or change data, which would skew every later iteration
+SKIPPED = {
+    'student_portal:student_logout', 'student_portal:mark_notification_read',
+    'student_portal:mark_all_notifications_read', 'instructor_portal:instructor_logout',
+    'instructor_portal:delete_assignment', 'admin_panel:admin_logout', 'admin_panel:delete_subject',
+}
+
+# Cache namespaces with a timeout that the views read from
+WARMED_CACHES = (FRAGMENT_CACHE, PROFILE_CACHE, SITE_CONFIG_CACHE, SEMESTER_CACHE)
+
+# Run in a fresh interpreter: import the WSGI application and serve the home
+# page through it, as a new serverless instance does for its first request
+COLD_START_SCRIPT = '''
+import json, sys, time
+from wsgiref.util import setup_testing_defaults
+start = time.perf_counter()
+from siat.wsgi import application
+imported = time.perf_counter()
+environ = {'PATH_INFO': '/', 'SERVER_NAME': sys.argv[1], 'HTTP_HOST': sys.argv[1]}
+setup_testing_defaults(environ)
+statuses = []
+b''.join(application(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+done = time.perf_counter()
+print(json.dumps({'import_ms': (imported - start) * 1000, 'request_ms': (done - imported) * 1000,
+                  'status': int(statuses[0].split()[0])}))
+'''
+
+
+class Command(BaseCommand):
+    help = ('Request every portal and site URL as a student, an instructor and an admin against a seeded '
+            'dataset (see seed_scale) and compare query counts and latency with the budget file')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=10, help='Timed requests per URL (after one warm-up)')
+        parser.add_argument('--budget', default=str(DEFAULT_BUDGET), help='Budget file to compare against')
+        parser.add_argument('--write-budget', action='store_true',
+                            help='Write the measured results as the new budget instead of comparing')
+        parser.add_argument('--latency-headroom', type=float, default=2.0,
+                            help='Multiplier applied to measured p95 when writing a budget')
+        parser.add_argument('--student', default='seed-student-1')
+        parser.add_argument('--instructor', default='seed-instructor-1')
+        parser.add_argument('--admin', default='seed-admin')
+        parser.add_argument('--only', help='Only benchmark URL names containing this text')
+        parser.add_argument('--cold-starts', type=int, default=5,
+                            help='Fresh processes started to time import plus first request (0 to skip)')
+
+    def handle(self, *args, **options):
+        # Template timing hooks, in case PERF_INSTRUMENTATION is off
+        perf.install()
+        users = {}
+        for portal in PORTALS.values():
+            try:
+                users[portal] = User.objects.get(username=options[portal])
+            except User.DoesNotExist:
+                raise CommandError(f'User "{options[portal]}" not found; run seed_scale first or pass --{portal}.')
+
+        samples = self.sample_kwargs(users)
+        clients = {portal: self.client_for(user, portal) for portal, user in users.items()}
+        clients[None] = self.new_client()
+
+        results = {}
+        unsampled = set()
+        # Views that write on GET are rolled back so the dataset stays as seeded
+        with transaction.atomic():
+            for name, kwargs_names in self.url_names():
+                if name in SKIPPED or name in results or (options['only'] and options['only'] not in name):
+                    continue
+                kwargs = {key: samples.get(name, {}).get(key) for key in kwargs_names}
+                if None in kwargs.values():
+                    unsampled.add(name)
+                    continue
+                client = clients[PORTALS.get(name.split(':')[0]) if ':' in name else None]
+                results[name] = self.measure(client, reverse(name, kwargs=kwargs), options['iterations'])
+            transaction.set_rollback(True)
+
+        # A name with several routes only needs one of them measured
+        for name in sorted(unsampled - set(results)):
+            self.stdout.write(self.style.WARNING(f'  - {name}: no sample object, skipped'))
+
+        if options['cold_starts'] and (not options['only'] or options['only'] in 'cold_start'):
+            results['cold_start'] = self.measure_cold_start(options['cold_starts'])
+
+        self.report(results)
+        if options['write_budget']:
+            self.write_budget(options['budget'], results, options['latency_headroom'])
+        else:
+            self.check_budget(options['budget'], results)
+
+    def url_names(self, patterns=None, namespace=None):
+        """Yield (name, kwarg names) for every named URL outside Django's admin site."""
+        for pattern in patterns if patterns is not None else get_resolver().url_patterns:
+            if isinstance(pattern, URLResolver):
+                if pattern.namespace == 'admin':
+                    continue
+                ns = ':'.join(filter(None, [namespace, pattern.namespace]))
+                yield from self.url_names(pattern.url_patterns, ns or None)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+                yield name, list(pattern.pattern.converters)
+
+    def new_client(self):
+        # Errors are recorded as 5xx results; the host must pass ALLOWED_HOSTS
+        return Client(raise_request_exception=False, SERVER_NAME=settings.ALLOWED_HOSTS[-1])
+
+    def client_for(self, user, portal):
+        client = self.new_client()
+        client.force_login(user)
+        session = client.session
+        session['portal'] = portal
+        session.save()
+        # The test client logs in under SESSION_COOKIE_NAME; portals read their own cookie
+        for _, setting in settings.PORTAL_SESSION_COOKIES:
+            client.cookies[getattr(settings, setting)] = session.session_key
+        return client
+
+    def sample_kwargs(self, users):
+        """URL kwargs per URL name, picked from the data the benchmark users can see."""
+        student = StudentProfile.objects.get(user=users['student'])
+        instructor = InstructorProfile.objects.get(user=users['instructor'])
+        semester = Semester.objects.filter(is_current=True).first()
+        enrollment = Enrollment.objects.filter(student=student).select_related('course').first()
+        student_subject = CourseSubject.objects.filter(
+            course_id=enrollment.course_id if enrollment else None, semester=semester
+        ).first()
+        student_assignment = Assignment.objects.filter(subject_id=getattr(student_subject, 'subject_id', None)).first()
+        instructor_subject = CourseSubject.objects.filter(instructor=instructor, semester=semester).first()
+        instructor_assignment = Assignment.objects.filter(
+            subject_id=getattr(instructor_subject, 'subject_id', None)
+        ).first()
+        course = enrollment.course if enrollment else Course.objects.first()
+        about = AboutSection.objects.first()
+        capture = next(iter(list_captures()), {}).get('id')
+
+        def pk(obj):
+            return obj.pk if obj else None
+
+        return {
+            'course_detail': {'slug': getattr(course, 'slug', None)},
+            'enroll_course': {'course_slug': getattr(course, 'slug', None)},
+            'student_portal:subject_detail': {'pk': getattr(student_subject, 'subject_id', None)},
+            'student_portal:course_detail': {'pk': pk(course)},
+            'student_portal:assignment_detail': {'pk': pk(student_assignment)},
+            'student_portal:download_pdf': {'assignment_id': pk(student_assignment)},
+            'instructor_portal:download_pdf': {'assignment_id': pk(instructor_assignment)},
+            'admin_panel:edit_about_section': {'pk': pk(about)},
+            'admin_panel:edit_student': {'student_id': student.pk},
+            'admin_panel:delete_student': {'pk': student.pk},
+            'admin_panel:edit_instructor': {'pk': instructor.pk},
+            'admin_panel:delete_instructor': {'pk': instructor.pk},
+            'admin_panel:edit_school': {'pk': pk(School.objects.first())},
+            'admin_panel:delete_school': {'pk': pk(School.objects.first())},
+            'admin_panel:edit_department': {'pk': pk(Department.objects.first())},
+            'admin_panel:delete_department': {'pk': pk(Department.objects.first())},
+            'admin_panel:edit_subject': {'pk': getattr(instructor_subject, 'subject_id', None)},
+            'admin_panel:assign_subject_to_courses': {'subject_id': getattr(instructor_subject, 'subject_id', None)},
+            'admin_panel:profile_detail': {'capture_id': capture},
+            'admin_panel:profile_download': {'capture_id': capture},
+            'admin_panel:assign_instructor_to_course': {
+                'subject_id': getattr(instructor_subject, 'subject_id', None)
+            },
+        }
+
+    def measure(self, client, url, iterations):
+        # Recompute expiring cache entries in the warm-up request, so none of them expires mid-run
+        for namespace in WARMED_CACHES:
+            namespace.invalidate()
+        runs = []
+        for i in range(iterations + 1):
+            with perf.collect() as metrics:
+                start = time.perf_counter()
+                response = client.get(url)
+                wall = time.perf_counter() - start
+            if i:  # the first request warms caches and is not counted
+                runs.append((wall, metrics.sql_count, metrics.sql_time, metrics.timings['template']))
+        walls = sorted(run[0] for run in runs)
+        return {
+            'url': url,
+            'status': response.status_code,
+            'queries': max(run[1] for run in runs),
+            'db_ms': statistics.mean(run[2] for run in runs) * 1000,
+            'template_ms': statistics.mean(run[3] for run in runs) * 1000,
+            'p50_ms': statistics.median(walls) * 1000,
+            'p95_ms': walls[min(len(walls) - 1, round(0.95 * (len(walls) - 1)))] * 1000,
+        }
+
+    def measure_cold_start(self, runs):
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            process = subprocess.run(
+                [sys.executable, '-c', COLD_START_SCRIPT, settings.ALLOWED_HOSTS[-1]],
+                cwd=settings.BASE_DIR, capture_output=True, text=True,
+            )
+            wall = time.perf_counter() - start
+            if process.returncode != 0:
+                raise CommandError(f'Cold start process failed:\n{process.stderr[-2000:]}')
+            sample = json.loads(process.stdout.strip().splitlines()[-1])
+            sample['total_ms'] = wall * 1000  # includes interpreter start-up
+            samples.append(sample)
+        totals = sorted(sample['total_ms'] for sample in samples)
+        return {
+            'url': '/ in a new process',
+            'status': max(sample['status'] for sample in samples),
+            'import_ms': statistics.median(sample['import_ms'] for sample in samples),
+            'request_ms': statistics.median(sample['request_ms'] for sample in samples),
+            'p50_ms': statistics.median(totals),
+            'p95_ms': totals[min(len(totals) - 1, round(0.95 * (len(totals) - 1)))],
+        }
+
+    def report(self, results):
+        self.stdout.write(f'\n{"View":<46} {"status":>6} {"queries":>7} {"db":>8} {"template":>9} '
+                          f'{"p50":>8} {"p95":>8}')
+        for name, r in sorted(results.items()):
+            if name == 'cold_start':
+                continue
+            self.stdout.write(f'{name:<46} {r["status"]:>6} {r["queries"]:>7} {r["db_ms"]:>6.1f}ms '
+                              f'{r["template_ms"]:>7.1f}ms {r["p50_ms"]:>6.1f}ms {r["p95_ms"]:>6.1f}ms')
+        cold = results.get('cold_start')
+        if cold:
+            self.stdout.write(f'\nCold start (new process, import + first request): status {cold["status"]}, '
+                              f'import {cold["import_ms"]:.0f}ms, first request {cold["request_ms"]:.0f}ms, '
+                              f'total p50 {cold["p50_ms"]:.0f}ms, p95 {cold["p95_ms"]:.0f}ms')
+
+    def write_budget(self, path, results, headroom):
+        budget = {
+            name: {'max_queries': r['queries'], 'p95_ms': round(max(r['p95_ms'] * headroom, 50))}
+            for name, r in sorted(results.items()) if name != 'cold_start'
+        }
+        if 'cold_start' in results:
+            budget['cold_start'] = {'p95_ms': round(results['cold_start']['p95_ms'] * headroom)}
+        Path(path).write_text(json.dumps(budget, indent=2) + '\n')
+        self.stdout.write(self.style.SUCCESS(f'\nBudget for {len(budget)} views written to {path}'))
+
+    def check_budget(self, path, results):
+        try:
+            budget = json.loads(Path(path).read_text())
+        except FileNotFoundError:
+            raise CommandError(f'No budget file at {path}; create one with --write-budget.')
+
+        failures = []
+        for name, r in sorted(results.items()):
+            if r['status'] >= 500:
+                failures.append(f'{name}: HTTP {r["status"]}')
+            limits = budget.get(name)
+            if limits is None:
+                self.stdout.write(self.style.WARNING(f'  - {name}: no budget entry'))
+                continue
+            if 'max_queries' in limits and r['queries'] > limits['max_queries']:
+                failures.append(f'{name}: {r["queries"]} queries (budget {limits["max_queries"]})')
+            if r['p95_ms'] > limits['p95_ms']:
+                failures.append(f'{name}: p95 {r["p95_ms"]:.1f}ms (budget {limits["p95_ms"]}ms)')
+
+        for failure in failures:
+            self.stdout.write(self.style.ERROR(f'  ✗ {failure}'))
+        if failures:
+            raise CommandError(f'{len(failures)} budget regressions')
+        self.stdout.write(self.style.SUCCESS(f'\nAll {len(results)} views within budget'))
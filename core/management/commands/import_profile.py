@@ -0,0 +1,61 @@
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+PROJECT_PACKAGES = ('siat', 'core', 'student_portal', 'instructor_portal', 'admin_panel')
+
+
+class Command(BaseCommand):
+    help = 'Report where a cold process spends its time importing the WSGI application (python -X importtime)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='siat.wsgi', help='Module a fresh process imports')
+        parser.add_argument('--top', type=int, default=20, help='Rows per table')
+
+    def handle(self, *args, **options):
+        # A fresh interpreter: this one has already imported everything
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {options["module"]}'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f'Importing {options["module"]} failed:\n{result.stderr[-2000:]}')
+
+        modules = []  # (self us, cumulative us, depth, name)
+        for line in result.stderr.splitlines():
+            match = IMPORTTIME_RE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                modules.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+        if not modules:
+            raise CommandError('No -X importtime output to parse')
+
+        total = sum(m[1] for m in modules if m[2] == 0)
+        self.stdout.write(f'{len(modules)} modules imported in {total / 1000:.0f}ms\n')
+
+        top = options['top']
+        self.stdout.write('Slowest imports, including what they import:')
+        for self_us, cumulative_us, depth, name in sorted(modules, key=lambda m: -m[1])[:top]:
+            self.stdout.write(f'  {cumulative_us / 1000:8.1f}ms  {"  " * min(depth, 6)}{name}')
+
+        self.stdout.write('\nSlowest module bodies:')
+        for self_us, cumulative_us, depth, name in sorted(modules, key=lambda m: -m[0])[:top]:
+            self.stdout.write(f'  {self_us / 1000:8.1f}ms  {name}')
+
+        packages = defaultdict(int)
+        for self_us, _, _, name in modules:
+            packages[name.split('.')[0]] += self_us
+        self.stdout.write('\nBy top-level package:')
+        for package, self_us in sorted(packages.items(), key=lambda p: -p[1])[:top]:
+            marker = '  (project)' if package in PROJECT_PACKAGES else ''
+            self.stdout.write(f'  {self_us / 1000:8.1f}ms  {package}{marker}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\nProject modules: {sum(packages[p] for p in PROJECT_PACKAGES) / 1000:.1f}ms of {total / 1000:.0f}ms'
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from core.outbox import pending_emails, send_pending
+
+
+class Command(BaseCommand):
+    help = 'Send queued outbox emails (run from cron after the commands that queue them)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='Emails per batch (default OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--all', action='store_true', help='Keep sending batches until the outbox is empty')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_pending(options['limit'])
+            total_sent += sent
+            total_failed += failed
+            # Stop on a batch with failures too, so a broken mail server is not retried in a tight loop
+            if not options['all'] or not sent or failed:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f'Sent {total_sent} emails'))
+        if total_failed:
+            self.stdout.write(self.style.ERROR(f'{total_failed} emails failed and will be retried'))
+        remaining = pending_emails().count()
+        if remaining:
+            self.stdout.write(f'{remaining} emails still pending')
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+from core.models import SlowQuery
+from core.slow_queries import explain
+
+
+class Command(BaseCommand):
+    help = 'Rank captured slow queries by total time spent, grouped by normalized statement'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=24, help='Time window to aggregate')
+        parser.add_argument('--limit', type=int, default=20, help='Number of statements to show')
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Print the latest EXPLAIN ANALYZE plan of each statement, running it first when there is none',
+        )
+        parser.add_argument(
+            '--prune-days',
+            type=int,
+            default=settings.SLOW_QUERY_RETENTION_DAYS,
+            help='Delete captures older than this many days first (default SLOW_QUERY_RETENTION_DAYS)',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['prune_days'])
+        deleted, _ = SlowQuery.objects.filter(created_at__lt=cutoff).delete()
+        if deleted:
+            self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} captures older than {options["prune_days"]} days'))
+
+        since = timezone.now() - timedelta(hours=options['hours'])
+        window = SlowQuery.objects.filter(created_at__gte=since)
+        statements = window.values('fingerprint').annotate(
+            count=Count('id'), total=Sum('duration_ms'), avg=Avg('duration_ms'), max=Max('duration_ms'),
+        ).order_by('-total')[:options['limit']]
+
+        if not statements:
+            self.stdout.write(self.style.SUCCESS(f'No slow queries in the last {options["hours"]:g} hours'))
+            return
+
+        self.stdout.write(f'Slowest statements in the last {options["hours"]:g} hours (by total time):\n')
+        for rank, row in enumerate(statements, start=1):
+            captures = window.filter(fingerprint=row['fingerprint']).order_by('-created_at')
+            latest = captures.first()
+            callers = captures.values('view', 'caller').annotate(n=Count('id')).order_by('-n')[:3]
+
+            self.stdout.write(self.style.WARNING(
+                f"{rank}. {row['count']}x  total {row['total']:.0f}ms  avg {row['avg']:.0f}ms  "
+                f"max {row['max']:.0f}ms  [{row['fingerprint'][:10]}]"
+            ))
+            self.stdout.write(f'   {latest.normalized_sql[:500]}')
+            for caller in callers:
+                self.stdout.write(f"   ← {caller['view'] or '-'} at {caller['caller'] or 'unknown'} ({caller['n']}x)")
+
+            if options['plans']:
+                planned = captures.exclude(plan='').first() or self.explain_latest(captures)
+                if planned:
+                    self.stdout.write(f'   Plan ({planned.created_at:%Y-%m-%d %H:%M}):')
+                    for line in planned.plan.splitlines():
+                        self.stdout.write(f'     {line[:300]}')
+                else:
+                    self.stdout.write('   No plan: only plain SELECTs can be explained')
+            self.stdout.write('')
+
+    def explain_latest(self, captures):
+        """Store and return a plan for the latest explainable capture, if there is one."""
+        capture = captures.exclude(params='').first()
+        if capture:
+            capture.plan = explain(capture)
+            capture.save(update_fields=['plan'])
+        return capture
@@ -0,0 +1,231 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters and histograms are aggregated in memory by each process and served
+at /metrics (see core.views.metrics). With several worker processes, set
+METRICS_MULTIPROCESS_DIR to a directory shared by the workers: each process
+then writes its totals to <dir>/<pid>.json (at most every
+METRICS_FLUSH_SECONDS) and a scrape sums the files of all processes.
+Gauges are not aggregated: their value is read from the database when
+/metrics is scraped.
+"""
+import json
+import math
+import os
+import threading
+import time
+
+from django.conf import settings
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, math.inf)
+
+_lock = threading.Lock()
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    @staticmethod
+    def merge(a, b):
+        return a + b
+
+    def lines(self, values):
+        for key, value in sorted(values.items()):
+            yield f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(buckets) if buckets[-1] == math.inf else tuple(buckets) + (math.inf,)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            # [per-bucket counts..., sum]; the +Inf bucket doubles as the count
+            state = self.values.setdefault(key, [0] * len(self.buckets) + [0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-1] += value
+
+    @staticmethod
+    def merge(a, b):
+        return [x + y for x, y in zip(a, b)]
+
+    def lines(self, values):
+        for key, state in sorted(values.items()):
+            for bound, count in zip(self.buckets, state):
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                yield f'{self.name}_bucket{labels} {count}'
+            labels = _format_labels(self.labelnames, key)
+            yield f'{self.name}_sum{labels} {_format_value(float(state[-1]))}'
+            yield f'{self.name}_count{labels} {state[-2]}'
+
+
+class Gauge(Metric):
+    """A value computed by ``function()`` on every scrape, such as a queue length"""
+    type = 'gauge'
+
+    def __init__(self, name, documentation, function, registry=None):
+        self.function = function
+        super().__init__(name, documentation, registry=registry)
+
+    def lines(self, values):
+        yield f'{self.name} {_format_value(self.function())}'
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics = {}
+        self._flushed_at = 0
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def snapshot(self):
+        with _lock:
+            return {
+                name: {json.dumps(key): (list(value) if isinstance(value, list) else value)
+                       for key, value in metric.values.items()}
+                for name, metric in self.metrics.items()
+            }
+
+    def flush(self, force=False):
+        """Write this process's totals for other processes to read (multiprocess mode only)."""
+        directory = getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+        now = time.monotonic()
+        if not directory or (not force and now - self._flushed_at < settings.METRICS_FLUSH_SECONDS):
+            return
+        self._flushed_at = now
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(f'{path}.tmp', path)
+
+    def collect(self):
+        """{metric name: {label tuple: value}} across all processes."""
+        directory = getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+        if not directory:
+            snapshots = [self.snapshot()]
+        else:
+            self.flush(force=True)
+            snapshots = []
+            for entry in os.listdir(directory):
+                if entry.endswith('.json'):
+                    try:
+                        with open(os.path.join(directory, entry)) as f:
+                            snapshots.append(json.load(f))
+                    except (OSError, ValueError):
+                        continue
+
+        merged = {}
+        for snapshot in snapshots:
+            for name, values in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                target = merged.setdefault(name, {})
+                for raw_key, value in values.items():
+                    key = tuple(json.loads(raw_key))
+                    target[key] = metric.merge(target[key], value) if key in target else value
+        return merged
+
+    def render(self):
+        values = self.collect()
+        lines = []
+        for name, metric in self.metrics.items():
+            lines += metric.header()
+            lines += metric.lines(values.get(name, {}))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+# Site metrics
+
+REQUESTS = Counter('siat_requests_total', 'HTTP requests by view, method and status',
+                   ['view', 'method', 'status'])
+REQUEST_DURATION = Histogram('siat_request_duration_seconds', 'Request latency by view', ['view'])
+DB_QUERIES = Counter('siat_db_queries_total', 'SQL queries executed while handling requests', ['view'])
+DB_QUERY_SECONDS = Counter('siat_db_query_seconds_total', 'Time spent in SQL while handling requests', ['view'])
+CACHE_REQUESTS = Counter('siat_cache_requests_total', 'Cache lookups by namespace and result',
+                         ['namespace', 'result'])
+NOTIFICATION_FANOUT = Histogram('siat_notification_fanout', 'Recipients per notification fan-out', ['type'],
+                                buckets=(1, 10, 50, 100, 250, 500, 1000, 5000, math.inf))
+
+
+def outbox_pending():
+    from .models import OutboundEmail
+
+    # As core.outbox.pending_emails, but emails a run is delivering right now are still backlog
+    return OutboundEmail.objects.filter(sent_at__isnull=True, attempts__lt=settings.OUTBOX_MAX_ATTEMPTS).count()
+
+
+def outbox_dead():
+    from .models import OutboundEmail
+
+    return OutboundEmail.objects.filter(sent_at__isnull=True, attempts__gte=settings.OUTBOX_MAX_ATTEMPTS).count()
+
+
+OUTBOX_PENDING = Gauge('siat_outbox_pending', 'Queued emails waiting to be sent (see core.outbox)', outbox_pending)
+OUTBOX_DEAD = Gauge('siat_outbox_dead', 'Unsent emails that used up OUTBOX_MAX_ATTEMPTS and will not be retried',
+                    outbox_dead)
+
+
+def observe_request(view, method, status, seconds, sql_count, sql_seconds):
+    view = view or 'unmatched'  # 404s must not add one series per path
+    REQUESTS.inc(view=view, method=method, status=status)
+    REQUEST_DURATION.observe(seconds, view=view)
+    DB_QUERIES.inc(sql_count, view=view)
+    DB_QUERY_SECONDS.inc(sql_seconds, view=view)
+    REGISTRY.flush()
+
+
+def record_cache(namespace, hit):
+    CACHE_REQUESTS.inc(namespace=namespace, result='hit' if hit else 'miss')
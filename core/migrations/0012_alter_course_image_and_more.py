@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-19 11:05
+
+import core.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_alter_contactinfo_address_alter_contactinfo_email_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='image',
+            field=core.fields.MediaField(blank=True, max_length=255, null=True, verbose_name='image'),
+        ),
+        migrations.AlterField(
+            model_name='enrollmentapplication',
+            name='identity_document',
+            field=core.fields.MediaField(max_length=255, verbose_name='identity_document'),
+        ),
+        migrations.AlterField(
+            model_name='enrollmentapplication',
+            name='secondary_results',
+            field=core.fields.MediaField(blank=True, max_length=255, null=True, verbose_name='secondary_results'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2 on 2026-10-19 11:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_alter_course_image_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=32)),
+                ('normalized_sql', models.TextField()),
+                ('sql', models.TextField()),
+                ('duration_ms', models.FloatField()),
+                ('view', models.CharField(blank=True, max_length=200)),
+                ('caller', models.CharField(blank=True, max_length=300)),
+                ('plan', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='slowquery',
+            index=models.Index(fields=['fingerprint', '-created_at'], name='slowquery_fingerprint_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_outbox_claims'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='slowquery',
+            name='params',
+            field=models.TextField(blank=True),
+        ),
+    ]
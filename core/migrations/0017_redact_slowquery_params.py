@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-19 13:02
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Q
+
+
+def redact_params(apps, schema_editor):
+    SlowQuery = apps.get_model('core', 'SlowQuery')
+    tables = Q()
+    for prefix in settings.SLOW_QUERY_REDACTED_TABLES:
+        tables |= Q(sql__contains=f'"{prefix}')
+    SlowQuery.objects.filter(tables).exclude(params='').update(params='', plan='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_slowquery_params'),
+    ]
+
+    operations = [
+        migrations.RunPython(redact_params, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,5 @@
 from django.db import models
-from cloudinary.models import CloudinaryField
+from .fields import MediaField
 from django.utils.text import slugify
 
 
@@ -28,7 +28,7 @@ class Course(models.Model):
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='diploma')
     duration = models.CharField(max_length=100, default='Not specified')  # e.g., '2 weeks' or '1 year'
     fee = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)  # e.g., 200.00 for cert
-    image = CloudinaryField('image', blank=True, null=True)  # Thumbnail via Cloudinary
+    image = MediaField('image', blank=True, null=True)  # Thumbnail via Cloudinary
     slug = models.SlugField(unique=True, blank=True)
 
     def save(self, *args, **kwargs):
@@ -77,8 +77,8 @@ class EnrollmentApplication(models.Model):
     disability_details = models.TextField(blank=True)  # Optional if 'other'
 
     # Documents (Cloudinary for storage)
-    identity_document = CloudinaryField('identity_document', resource_type='raw')  # PDF/Image
-    secondary_results = CloudinaryField('secondary_results', blank=True, null=True, resource_type='raw')  # Required for diplomas
+    identity_document = MediaField('identity_document', resource_type='raw')  # PDF/Image
+    secondary_results = MediaField('secondary_results', blank=True, null=True, resource_type='raw')  # Required for diplomas
 
     # Other
     course = models.ForeignKey(Course, on_delete=models.CASCADE, null=True, blank=True)
@@ -112,4 +112,47 @@ class ContactMessage(models.Model):
     sent_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.name} - {self.subject}"
\ No newline at end of file
+        return f"{self.name} - {self.subject}"
+
+
+class SlowQuery(models.Model):
+    """An ORM query that exceeded SLOW_QUERY_MS (see core.slow_queries)"""
+    fingerprint = models.CharField(max_length=32)  # md5 of the normalized SQL
+    normalized_sql = models.TextField()
+    sql = models.TextField()
+    duration_ms = models.FloatField()
+    view = models.CharField(max_length=200, blank=True)
+    caller = models.CharField(max_length=300, blank=True)  # first project frame, "path:line in function"
+    params = models.TextField(blank=True)  # JSON parameters of SELECTs, for explaining them later
+    plan = models.TextField(blank=True)  # EXPLAIN (ANALYZE, BUFFERS) output, filled by the slow_queries command
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['fingerprint', '-created_at'], name='slowquery_fingerprint_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.duration_ms:.0f}ms {self.view or '-'}: {self.normalized_sql[:80]}"
+
+
+class OutboundEmail(models.Model):
+    """An email waiting to be sent by the send_outbox command (see core.outbox)"""
+    key = models.CharField(max_length=150, unique=True)  # idempotency key; queuing the same key twice is a no-op
+    to = models.EmailField()
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    # Set while a send_outbox run is delivering it, so overlapping runs skip it
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], condition=models.Q(sent_at__isnull=True), name='outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.to} - {self.subject}"
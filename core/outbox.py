@@ -0,0 +1,91 @@
+"""
+Email outbox.
+
+Features queue emails as OutboundEmail rows instead of sending them inside
+a request or a long-running command:
+
+    queue_emails([OutboundEmail(key='reminder:12:24h:7', to=..., subject=..., body=...)])
+
+Every email has an idempotency key, so queuing the same email again (a
+rerun cron job, a retried request) does nothing. The send_outbox command
+delivers pending emails in batches over one SMTP connection and retries
+failures up to OUTBOX_MAX_ATTEMPTS times. Each run claims its batch first,
+so overlapping runs never send the same email twice.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+logger = logging.getLogger(__name__)
+
+
+def queue_emails(emails):
+    """Insert the emails whose keys are not queued yet. Returns how many were new."""
+    emails = list(emails)
+    if not emails:
+        return 0
+    queued = set(OutboundEmail.objects.filter(key__in=[email.key for email in emails]).values_list('key', flat=True))
+    new = [email for email in emails if email.key not in queued]
+    # A concurrent run may still insert the same key first; that row wins
+    OutboundEmail.objects.bulk_create(new, batch_size=500, ignore_conflicts=True)
+    return len(new)
+
+
+def pending_emails(now=None):
+    """Unsent emails with attempts left that no run is delivering right now."""
+    now = now or timezone.now()
+    return OutboundEmail.objects.filter(
+        Q(claimed_until__isnull=True) | Q(claimed_until__lt=now),
+        sent_at__isnull=True, attempts__lt=settings.OUTBOX_MAX_ATTEMPTS,
+    ).order_by('created_at')
+
+
+def claim_batch(limit):
+    """Lock and claim up to ``limit`` pending emails; rows locked by another run are skipped."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(pending_emails(now).select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+        OutboundEmail.objects.filter(id__in=ids).update(
+            claimed_until=now + timedelta(seconds=settings.OUTBOX_CLAIM_SECONDS)
+        )
+    return list(OutboundEmail.objects.filter(id__in=ids).order_by('created_at'))
+
+
+def send_pending(limit=None):
+    """
+    Send up to ``limit`` pending emails (OUTBOX_BATCH_SIZE by default).
+    Each email is marked sent as soon as it is delivered.
+
+    Returns:
+        (sent, failed) counts
+    """
+    batch = claim_batch(limit or settings.OUTBOX_BATCH_SIZE)
+    if not batch:
+        return 0, 0
+    sent = failed = 0
+    with get_connection() as connection:
+        for email in batch:
+            message = EmailMessage(email.subject, email.body, settings.DEFAULT_FROM_EMAIL, [email.to],
+                                   connection=connection)
+            try:
+                message.send()
+            except Exception as e:
+                logger.error(f"Outbox email {email.key} failed: {str(e)}")
+                OutboundEmail.objects.filter(id=email.id).update(
+                    attempts=F('attempts') + 1, last_error=str(e), claimed_until=None,
+                )
+                failed += 1
+            else:
+                OutboundEmail.objects.filter(id=email.id).update(
+                    sent_at=timezone.now(), attempts=F('attempts') + 1, claimed_until=None,
+                )
+                sent += 1
+    return sent, failed
@@ -0,0 +1,190 @@
+"""
+Per-request performance instrumentation.
+
+``PerformanceMiddleware`` collects, for each request, the SQL query count and
+time (through ``connection.execute_wrapper``), template render time and the
+time spent in Cloudinary and email calls. Sampled requests get a
+``Server-Timing`` header and an INFO log line on the ``siat.perf`` logger;
+requests slower than PERF_SLOW_REQUEST_MS are always logged, at WARNING,
+together with their slowest SQL statements. Every request also feeds the
+request counters in core.metrics, and single queries slower than
+SLOW_QUERY_MS are stored by core.slow_queries.
+
+Code outside the ORM and templates reports its time with ``timed``:
+
+    with timed('cloudinary'):
+        upload(file)
+"""
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager, ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import observe_request
+from .slow_queries import SlowStatement, find_caller, record_slow_queries
+
+
+logger = logging.getLogger('siat.perf')
+
+_metrics = ContextVar('request_metrics', default=None)
+_installed = False
+
+# Server-Timing metric names for the timed categories
+SERVER_TIMING_NAMES = {'template': 'tpl', 'cloudinary': 'cdn', 'email': 'mail'}
+
+
+class RequestMetrics:
+    """Timings of one request; also the execute_wrapper that counts its SQL."""
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0
+        self.queries = []
+        self.slow_queries = []
+        self.timings = defaultdict(float)
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.sql_count += 1
+            self.sql_time += duration
+            self.queries.append((duration, sql))
+            if duration * 1000 >= settings.SLOW_QUERY_MS:
+                self.slow_queries.append(SlowStatement(
+                    duration, sql, params, many, find_caller(), context['connection'].alias,
+                ))
+
+    def slowest_queries(self, limit):
+        return [{'ms': round(duration * 1000, 2), 'sql': sql}
+                for duration, sql in sorted(self.queries, key=lambda q: q[0], reverse=True)[:limit]]
+
+    def server_timing(self, total):
+        entries = [f'db;dur={self.sql_time * 1000:.1f};desc="{self.sql_count} queries"']
+        entries += [f'{SERVER_TIMING_NAMES.get(name, name)};dur={seconds * 1000:.1f}'
+                    for name, seconds in sorted(self.timings.items())]
+        entries.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(entries)
+
+
+@contextmanager
+def collect():
+    """
+    Record metrics for the enclosed block on every database connection.
+    A nested block shares the outer block's metrics.
+    """
+    current = _metrics.get()
+    if current is not None:
+        yield current
+        return
+    metrics = RequestMetrics()
+    token = _metrics.set(metrics)
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(metrics))
+            yield metrics
+    finally:
+        _metrics.reset(token)
+
+
+@contextmanager
+def timed(category):
+    """Add the time spent in the block to the current request's ``category``."""
+    metrics = _metrics.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[category] += time.perf_counter() - start
+
+
+def install():
+    """
+    Time template rendering and outgoing email. Called once from
+    CoreConfig.ready() when PERF_INSTRUMENTATION is on.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    from django.core.mail import EmailMessage
+    from django.template.backends.django import Template
+
+    render = Template.render
+    send = EmailMessage.send
+
+    def timed_render(self, context=None, request=None):
+        metrics = _metrics.get()
+        if metrics is None or metrics.template_depth:
+            # Nested renders (render_to_string inside a tag) count towards their parent
+            return render(self, context, request)
+        metrics.template_depth += 1
+        try:
+            with timed('template'):
+                return render(self, context, request)
+        finally:
+            metrics.template_depth -= 1
+
+    def timed_send(self, fail_silently=False):
+        with timed('email'):
+            return send(self, fail_silently)
+
+    Template.render = timed_render
+    EmailMessage.send = timed_send
+
+
+class PerformanceMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.PERF_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with collect() as metrics:
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = match.view_name if match else None
+        observe_request(view, request.method, response.status_code, total, metrics.sql_count, metrics.sql_time)
+        if metrics.slow_queries:
+            record_slow_queries(metrics.slow_queries, view)
+
+        slow = total * 1000 >= settings.PERF_SLOW_REQUEST_MS
+        if not slow and random.random() >= settings.PERF_SAMPLE_RATE:
+            return response
+
+        response['Server-Timing'] = metrics.server_timing(total)
+        record = {
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(total * 1000, 1),
+            'sql_count': metrics.sql_count,
+            'sql_ms': round(metrics.sql_time * 1000, 1),
+            **{f'{name}_ms': round(seconds * 1000, 1) for name, seconds in metrics.timings.items()},
+        }
+        if slow:
+            record['slow_queries'] = metrics.slowest_queries(settings.PERF_SLOW_SQL_LIMIT)
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+        return response
@@ -0,0 +1,66 @@
+"""
+Portal identity of the logged-in user.
+
+PortalIdentityMiddleware puts ``request.student`` and ``request.instructor``
+on every request. Each is resolved on first access, with its school or
+department joined in, and cached per user for PORTAL_PROFILE_CACHE_SECONDS,
+so the pages of a session after the first do not query for it. Saving or
+deleting a profile drops its cached copy.
+
+Like the ``get_object_or_404(StudentProfile, user=request.user)`` calls it
+replaces, accessing the profile of a user who has none raises Http404.
+Forms that edit a profile should load a fresh instance instead.
+"""
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.http import Http404
+from django.utils.functional import SimpleLazyObject
+
+from instructor_portal.models import InstructorProfile
+from student_portal.models import StudentProfile
+from .cache import CacheNamespace
+
+
+# request attribute: (profile model, related objects loaded with it)
+PROFILES = {
+    'student': (StudentProfile, ['school']),
+    'instructor': (InstructorProfile, ['department__school']),
+}
+
+
+PROFILE_CACHE = CacheNamespace('portal-profile', timeout=settings.PORTAL_PROFILE_CACHE_SECONDS)
+
+
+def load_profile(kind, user):
+    model, related = PROFILES[kind]
+    profile = model.objects.select_related(*related).filter(user=user).first()
+    if profile is None:
+        raise Http404(f'No {model._meta.verbose_name} for this user')
+    return profile
+
+
+def get_profile(kind, user):
+    if not user.is_authenticated:
+        raise Http404
+    return PROFILE_CACHE.get_or_set(f'{kind}:{user.pk}', lambda: load_profile(kind, user))
+
+
+@receiver(post_save, sender=StudentProfile)
+@receiver(post_delete, sender=StudentProfile)
+@receiver(post_save, sender=InstructorProfile)
+@receiver(post_delete, sender=InstructorProfile)
+def invalidate_profile(sender, instance, **kwargs):
+    kind = 'student' if sender is StudentProfile else 'instructor'
+    PROFILE_CACHE.delete(f'{kind}:{instance.user_id}')
+
+
+class PortalIdentityMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        for kind in PROFILES:
+            setattr(request, kind, SimpleLazyObject(lambda kind=kind: get_profile(kind, request.user)))
+        return self.get_response(request)
@@ -0,0 +1,165 @@
+"""
+On-demand request profiling.
+
+Staff generate a signed token in the admin panel (Admin Panel > Profiles).
+Any request carrying it, as ``?_profile=<token>`` or an ``X-Siat-Profile``
+header, runs under cProfile. The stats, a text summary and the request's SQL
+log are stored under PROFILE_DIR. Only the newest PROFILE_MAX_CAPTURES are
+kept, and they are listed in the admin panel.
+
+The token is what authorizes profiling, so a staff member can hand a link
+to the user who sees the slow page and get a profile of their real request.
+"""
+import io
+import json
+import os
+import re
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+
+from . import perf
+
+
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'X-Siat-Profile'
+TOKEN_SALT = 'siat.profiling'
+SUMMARY_LINES = 40
+
+CAPTURE_ID_RE = re.compile(r'^\d{8}-\d{6}-[0-9a-f]{6}$')
+
+# Held by the request being profiled
+_profiling = threading.Lock()
+
+
+def make_profile_token(user):
+    return signing.dumps({'by': user.username}, salt=TOKEN_SALT)
+
+
+def profile_requested_by(request):
+    """Username of the staff member who issued the request's profiling token, if it is valid."""
+    token = request.GET.get(PROFILE_PARAM) or request.headers.get(PROFILE_HEADER)
+    if not token:
+        return None
+    try:
+        return signing.loads(token, salt=TOKEN_SALT, max_age=settings.PROFILE_TOKEN_MAX_AGE)['by']
+    except (signing.BadSignature, KeyError, TypeError):
+        return None
+
+
+def _path(capture_id, ext):
+    return os.path.join(settings.PROFILE_DIR, f'{capture_id}.{ext}')
+
+
+def save_capture(profiler, metrics, request, response, duration, issued_by):
+    import pstats
+
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    capture_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+    profiler.dump_stats(_path(capture_id, 'prof'))
+
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(SUMMARY_LINES)
+    match = request.resolver_match
+    user = getattr(request, 'user', None)
+    capture = {
+        'id': capture_id,
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'method': request.method,
+        'path': request.path,
+        'view': match.view_name if match else None,
+        'status': response.status_code,
+        'user': user.get_username() if user is not None and user.is_authenticated else None,
+        'issued_by': issued_by,
+        'duration_ms': round(duration * 1000, 1),
+        'sql_count': metrics.sql_count,
+        'sql_ms': round(metrics.sql_time * 1000, 1),
+        'queries': [{'ms': round(d * 1000, 2), 'sql': sql} for d, sql in metrics.queries],
+        'summary': summary.getvalue(),
+    }
+    with open(_path(capture_id, 'json'), 'w') as f:
+        json.dump(capture, f)
+
+    _enforce_retention()
+    return capture_id
+
+
+def _enforce_retention():
+    ids = sorted(entry[:-5] for entry in os.listdir(settings.PROFILE_DIR) if entry.endswith('.json'))
+    for capture_id in ids[:-settings.PROFILE_MAX_CAPTURES or None]:
+        for ext in ('json', 'prof'):
+            try:
+                os.remove(_path(capture_id, ext))
+            except FileNotFoundError:
+                pass
+
+
+def list_captures():
+    """Stored captures, newest first (without the profile summary and SQL)."""
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    captures = []
+    for entry in sorted(os.listdir(settings.PROFILE_DIR), reverse=True):
+        if entry.endswith('.json'):
+            capture = get_capture(entry[:-5])
+            if capture:
+                capture.pop('summary')
+                capture['sql_log'] = len(capture.pop('queries'))
+                captures.append(capture)
+    return captures
+
+
+def get_capture(capture_id):
+    if not CAPTURE_ID_RE.match(capture_id):
+        return None
+    try:
+        with open(_path(capture_id, 'json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def capture_stats_path(capture_id):
+    if CAPTURE_ID_RE.match(capture_id) and os.path.exists(_path(capture_id, 'prof')):
+        return _path(capture_id, 'prof')
+    return None
+
+
+class ProfilingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        issued_by = profile_requested_by(request)
+        # Only one profiler can be active per process (enabling a second raises
+        # ValueError on Python 3.12+), so overlapping requests run unprofiled
+        if not issued_by or not _profiling.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self.profile(request, issued_by)
+        finally:
+            _profiling.release()
+
+    def profile(self, request, issued_by):
+        # Imported on first use: most processes never profile a request
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (not started by this middleware) is already active
+            return self.get_response(request)
+        with perf.collect() as metrics:
+            start = time.perf_counter()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            duration = time.perf_counter() - start
+
+        response['X-Siat-Profile-Id'] = save_capture(profiler, metrics, request, response, duration, issued_by)
+        return response
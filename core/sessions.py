@@ -0,0 +1,87 @@
+"""
+Per-portal session cookies.
+
+The student portal, the instructor portal and the admin panel each keep
+their own session cookie (STUDENT_/INSTRUCTOR_/ADMIN_SESSION_COOKIE_NAME),
+so logging into or out of one portal leaves the others alone. All other
+URLs use SESSION_COOKIE_NAME.
+
+When CACHE_REDIS_URL is set, sessions are stored with the cached_db
+engine: reads come from the shared cache and only fall back to the
+database on a miss, while writes go to both. Without Redis they use the
+db engine, because the file cache is not shared between instances.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.base import UpdateError
+from django.contrib.sessions.exceptions import SessionInterrupted
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+
+
+def session_cookie_name(path):
+    for prefix, setting in settings.PORTAL_SESSION_COOKIES:
+        if path.startswith(prefix):
+            return getattr(settings, setting)
+    return settings.SESSION_COOKIE_NAME
+
+
+class PortalSessionMiddleware(SessionMiddleware):
+    """SessionMiddleware with the cookie name picked by session_cookie_name()."""
+
+    def process_request(self, request):
+        request.session_cookie_name = session_cookie_name(request.path_info)
+        request.session = self.SessionStore(request.COOKIES.get(request.session_cookie_name))
+
+    def process_response(self, request, response):
+        # Django's implementation, with the cookie name taken from the request
+        try:
+            accessed = request.session.accessed
+            modified = request.session.modified
+            empty = request.session.is_empty()
+            cookie_name = request.session_cookie_name
+        except AttributeError:
+            return response
+
+        if cookie_name in request.COOKIES and empty:
+            response.delete_cookie(
+                cookie_name,
+                path=settings.SESSION_COOKIE_PATH,
+                domain=settings.SESSION_COOKIE_DOMAIN,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+            patch_vary_headers(response, ('Cookie',))
+            return response
+
+        if accessed:
+            patch_vary_headers(response, ('Cookie',))
+        if (modified or settings.SESSION_SAVE_EVERY_REQUEST) and not empty:
+            if request.session.get_expire_at_browser_close():
+                max_age = None
+                expires = None
+            else:
+                max_age = request.session.get_expiry_age()
+                expires = http_date(time.time() + max_age)
+            # Skip session save for 5xx responses
+            if response.status_code < 500:
+                try:
+                    request.session.save()
+                except UpdateError:
+                    raise SessionInterrupted(
+                        "The request's session was deleted before the request completed. "
+                        "The user may have logged out in a concurrent request, for example."
+                    )
+                response.set_cookie(
+                    cookie_name,
+                    request.session.session_key,
+                    max_age=max_age,
+                    expires=expires,
+                    domain=settings.SESSION_COOKIE_DOMAIN,
+                    path=settings.SESSION_COOKIE_PATH,
+                    secure=settings.SESSION_COOKIE_SECURE or None,
+                    httponly=settings.SESSION_COOKIE_HTTPONLY or None,
+                    samesite=settings.SESSION_COOKIE_SAMESITE,
+                )
+        return response
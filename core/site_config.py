@@ -0,0 +1,96 @@
+"""
+Cached site configuration.
+
+PortalSettings, ContactInfo and the AboutSection list are edited a few
+times a year but read on many pages, so they are loaded together into one
+SiteConfig snapshot and cached for SITE_CONFIG_CACHE_SECONDS. Saving or
+deleting any of them drops the snapshot.
+
+Templates get it as ``site_config`` (see core.context_processors), and
+PortalGateMiddleware uses it to close the student and instructor portals.
+"""
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.shortcuts import render
+
+from admin_panel.models import AboutSection, PortalSettings
+from .cache import CacheNamespace
+from .models import ContactInfo
+
+
+SITE_CONFIG_CACHE = CacheNamespace('site-config', timeout=settings.SITE_CONFIG_CACHE_SECONDS)
+
+# Shown on the contact page until a ContactInfo row is saved
+DEFAULT_CONTACT = {
+    'phone': '+260 076 251632',
+    'email': 'sunriseinstituteofapplied21@gmail.com',
+    'address': 'Sunrise Institute, Monze, Zambia',
+}
+
+# URL namespace of each portal that PortalSettings can close
+PORTAL_FLAGS = {
+    'student_portal': 'student_portal_active',
+    'instructor_portal': 'instructor_portal_active',
+}
+
+
+@dataclass
+class SiteConfig:
+    portal: PortalSettings
+    contact: ContactInfo
+    about_sections: list
+
+    def portal_active(self, namespace):
+        flag = PORTAL_FLAGS.get(namespace)
+        return flag is None or getattr(self.portal, flag)
+
+
+def load_site_config():
+    return SiteConfig(
+        # Unsaved defaults until an admin saves the settings; reads never write
+        portal=PortalSettings.objects.first() or PortalSettings(),
+        contact=ContactInfo.objects.first() or ContactInfo(**DEFAULT_CONTACT),
+        about_sections=list(AboutSection.objects.all()),
+    )
+
+
+def get_site_config():
+    return SITE_CONFIG_CACHE.get_or_set('snapshot', load_site_config)
+
+
+@receiver(post_save, sender=PortalSettings)
+@receiver(post_delete, sender=PortalSettings)
+@receiver(post_save, sender=ContactInfo)
+@receiver(post_delete, sender=ContactInfo)
+@receiver(post_save, sender=AboutSection)
+@receiver(post_delete, sender=AboutSection)
+def invalidate_site_config(sender, **kwargs):
+    SITE_CONFIG_CACHE.invalidate()
+
+
+class PortalGateMiddleware:
+    """
+    Answer 503 with the maintenance message for a portal that PortalSettings
+    has switched off. Staff still get through to check it before reopening.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        namespace = request.resolver_match.namespace
+        if namespace not in PORTAL_FLAGS or request.user.is_staff:
+            return None
+        config = get_site_config()
+        if config.portal_active(namespace):
+            return None
+        return render(request, 'portal_closed.html', {
+            'portal_name': 'Student Portal' if namespace == 'student_portal' else 'Instructor Portal',
+            'maintenance_message': config.portal.maintenance_message,
+        }, status=503)
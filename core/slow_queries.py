@@ -0,0 +1,135 @@
+"""
+Slow-query capture.
+
+core.perf times every query of a request. Those slower than SLOW_QUERY_MS
+are kept with their parameters and the project line that issued them. When
+the response is ready they are stored as SlowQuery rows, with normalized
+SQL so that repeats of one statement group together, and logged on
+``siat.perf``.
+
+Plain SELECTs are stored with their parameters too, so that
+``manage.py slow_queries --plans`` can run ``EXPLAIN (ANALYZE, BUFFERS)``
+on them later, outside of any request. Parameters of queries on the
+tables in SLOW_QUERY_REDACTED_TABLES (sessions, users) are never stored,
+so those statements get no plan. The same command ranks statements
+over a time window and deletes captures older than
+SLOW_QUERY_RETENTION_DAYS.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import traceback
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction, DatabaseError
+
+
+logger = logging.getLogger('siat.perf')
+
+NORMALIZE_RULES = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),             # string literals
+    (re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?\b'), '?'),  # numbers, not digits inside identifiers
+    (re.compile(r'%s'), '?'),                          # driver placeholders
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?)'),  # IN lists of any length
+    (re.compile(r'\s+'), ' '),
+]
+
+# Frames in these files are instrumentation, not the code that ran the query
+SKIPPED_FILES = ('core/perf.py', 'core/slow_queries.py')
+
+
+@dataclass
+class SlowStatement:
+    duration: float
+    sql: str
+    params: object
+    many: bool
+    caller: str
+    alias: str
+
+
+def normalize_sql(sql):
+    for pattern, replacement in NORMALIZE_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def find_caller():
+    """'path:line in function' of the innermost project frame on the stack."""
+    root = str(settings.BASE_DIR) + os.sep
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if not filename.startswith(root) or 'site-packages' in filename:
+            continue
+        relative = os.path.relpath(filename, root)
+        if relative.replace(os.sep, '/') not in SKIPPED_FILES:
+            return f'{relative}:{frame.lineno} in {frame.name}'[:300]
+    return ''
+
+
+def explainable(statement):
+    """Whether EXPLAIN ANALYZE may replay the statement: it executes it, so only plain reads are safe."""
+    if statement.many or connections[statement.alias].vendor != 'postgresql':
+        return False
+    sql = statement.sql.lstrip().upper()
+    return sql.startswith('SELECT') and 'FOR UPDATE' not in sql
+
+
+def sensitive(sql):
+    """Whether the statement reads a table whose parameters are secrets (session keys, credentials)."""
+    return any(f'"{prefix}' in sql for prefix in settings.SLOW_QUERY_REDACTED_TABLES)
+
+
+def stored_params(statement):
+    """
+    JSON of the statement parameters, or '' when it cannot be explained
+    later or its parameters must not be stored.
+    """
+    if not explainable(statement) or sensitive(statement.sql):
+        return ''
+    try:
+        return json.dumps(statement.params, cls=DjangoJSONEncoder)
+    except (TypeError, ValueError):
+        return ''
+
+
+def explain(capture, using='default'):
+    """
+    EXPLAIN (ANALYZE, BUFFERS) of a stored SlowQuery under a statement
+    timeout. Run from the slow_queries command, never inside a request.
+    """
+    try:
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            cursor.execute('SET LOCAL statement_timeout = %s', [settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS])
+            cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {capture.sql}', json.loads(capture.params))
+            return '\n'.join(row[0] for row in cursor.fetchall())
+    except DatabaseError as e:
+        return f'EXPLAIN failed: {e}'
+
+
+def record_slow_queries(statements, view):
+    from .models import SlowQuery
+
+    for statement in statements:
+        normalized = normalize_sql(statement.sql)
+        fingerprint = hashlib.md5(normalized.encode()).hexdigest()
+        logger.warning(json.dumps({
+            'event': 'slow_query',
+            'view': view,
+            'caller': statement.caller,
+            'ms': round(statement.duration * 1000, 1),
+            'fingerprint': fingerprint,
+            'sql': normalized,
+        }))
+        try:
+            SlowQuery.objects.create(
+                fingerprint=fingerprint, normalized_sql=normalized, sql=statement.sql,
+                duration_ms=round(statement.duration * 1000, 2), view=(view or '')[:200],
+                caller=statement.caller, params=stored_params(statement),
+            )
+        except DatabaseError:
+            logger.exception('Could not store slow query')
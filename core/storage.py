@@ -0,0 +1,220 @@
+"""
+Media storage backends.
+
+Views and model fields upload files and build delivery URLs through
+``get_media_storage()`` instead of calling the Cloudinary SDK directly. Two
+backends share the same upload-response shape (public_id, version, format,
+resource_type, type, secure_url):
+
+- ``cloudinary``: the live service (default).
+- ``local``: files under MEDIA_ROOT, laid out like Cloudinary delivery URLs,
+  so upload-heavy paths can be load-tested on an offline machine.
+
+The backend is chosen with ``settings.MEDIA_BACKEND``.
+"""
+import os
+import re
+import secrets
+import string
+import time
+from functools import lru_cache
+
+from cloudinary import CloudinaryResource
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .perf import timed
+
+
+PUBLIC_ID_ALPHABET = string.ascii_lowercase + string.digits
+
+
+def configure_cloudinary():
+    """Hand the CLOUDINARY_STORAGE credentials to the SDK (called from CoreConfig.ready)."""
+    import cloudinary
+    credentials = settings.CLOUDINARY_STORAGE
+    cloudinary.config(
+        cloud_name=credentials['CLOUD_NAME'],
+        api_key=credentials['API_KEY'],
+        api_secret=credentials['API_SECRET'],
+        secure=True,
+    )
+
+
+class CloudinaryMediaStorage:
+    """Thin wrapper around the Cloudinary uploader and URL builder"""
+
+    def upload(self, file, **options):
+        from cloudinary.uploader import upload
+        with timed('cloudinary'):
+            return upload(file, **options)
+
+    def url(self, public_id, **options):
+        from cloudinary.utils import cloudinary_url
+        options.setdefault('secure', True)
+        return cloudinary_url(public_id, **options)[0]
+
+    def destroy(self, public_id, **options):
+        from cloudinary.uploader import destroy
+        with timed('cloudinary'):
+            return destroy(public_id, **options)
+
+    def variant_url(self, resource, width, format):
+        # Derived on first request by Cloudinary's transformation pipeline
+        return self.url(resource.public_id, resource_type='image', type=resource.type, version=resource.version,
+                        format=format, width=width, crop='limit', quality='auto')
+
+    def resource(self, result, default_resource_type='image'):
+        return CloudinaryResource(metadata=result, default_resource_type=default_resource_type)
+
+    def wrap(self, resource):
+        return resource
+
+
+class LocalResource(CloudinaryResource):
+    """CloudinaryResource whose URLs point at the local media backend"""
+
+    def build_url(self, **options):
+        combined = dict(format=self.format, version=self.version, type=self.type,
+                        resource_type=self.resource_type or 'image')
+        combined.update(options)
+        return get_media_storage().url(self.public_id, **combined)
+
+
+class LocalMediaStorage:
+    """
+    Stores files under MEDIA_ROOT/<resource_type>/<type>/<public_id>[.<format>],
+    mirroring the path layout of Cloudinary delivery URLs.
+    Like Cloudinary, raw uploads keep the extension in the public_id while
+    images and videos carry it separately as the format.
+    """
+
+    def __init__(self, root=None, base_url=None):
+        self.root = str(root or settings.MEDIA_ROOT)
+        self.base_url = (base_url or settings.LOCAL_MEDIA_BASE_URL).rstrip('/') + settings.MEDIA_URL
+
+    def upload(self, file, resource_type='image', type='upload', public_id=None, folder=None, **options):
+        name = os.path.basename(getattr(file, 'name', None) or str(file))
+        stem, ext = os.path.splitext(name)
+        ext = ext.lstrip('.').lower()
+
+        if resource_type == 'auto':
+            resource_type = 'image' if ext in ('jpg', 'jpeg', 'png', 'gif', 'webp') else 'raw'
+        if not public_id:
+            public_id = ''.join(secrets.choice(PUBLIC_ID_ALPHABET) for _ in range(20))
+        if folder:
+            public_id = f"{folder.strip('/')}/{public_id}"
+
+        file_format = None
+        if resource_type == 'raw':
+            if ext and not public_id.endswith(f'.{ext}'):
+                public_id = f'{public_id}.{ext}'
+        else:
+            file_format = 'jpg' if ext == 'jpeg' else (ext or None)
+
+        path = self.path(public_id, resource_type=resource_type, type=type, format=file_format)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = self._write(file, path)
+
+        version = int(time.time())
+        url = self.url(public_id, resource_type=resource_type, type=type, version=version, format=file_format)
+        return {
+            'public_id': public_id,
+            'version': version,
+            'format': file_format,
+            'resource_type': resource_type,
+            'type': type,
+            'bytes': size,
+            'original_filename': stem,
+            'url': url,
+            'secure_url': url,
+        }
+
+    def url(self, public_id, resource_type='image', type='upload', version=None, format=None, **options):
+        # Rows that stored a full URL (e.g. an earlier secure_url) are returned as-is
+        if re.match(r'^https?:', public_id):
+            return f'{public_id}.{format}' if format else public_id
+        # The version is only a CDN cache-buster, so local URLs leave it out
+        relative = f'{public_id}.{format}' if format else public_id
+        return f'{self.base_url}{resource_type}/{type}/{relative}'
+
+    def destroy(self, public_id, resource_type='image', type='upload', **options):
+        base = self.path(public_id, resource_type=resource_type, type=type)
+        directory = os.path.dirname(base)
+        prefix = os.path.basename(base)
+        if os.path.isdir(directory):
+            for entry in os.listdir(directory):
+                if entry == prefix or entry.startswith(prefix + '.'):
+                    os.remove(os.path.join(directory, entry))
+                    return {'result': 'ok'}
+        return {'result': 'not found'}
+
+    def variant_url(self, resource, width, format):
+        """
+        Width-bounded copy of an image, rendered with Pillow on first use and
+        kept next to the original under w_<width>/ (never upscaled).
+        """
+        if re.match(r'^https?:', resource.public_id):
+            return resource.url
+        variant_id = f'w_{width}/{resource.public_id}'
+        target = self.path(variant_id, resource_type='image', type=resource.type, format=format)
+        if not os.path.exists(target):
+            source = self.path(resource.public_id, resource_type='image', type=resource.type, format=resource.format)
+            if not os.path.exists(source):
+                return resource.url
+            from PIL import Image
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with Image.open(source) as img:
+                img.thumbnail((width, width * 10))
+                if format == 'webp':
+                    img.save(target, 'WEBP', quality=80)
+                else:
+                    img.convert('RGB').save(target, 'JPEG', quality=82, optimize=True, progressive=True)
+        return self.url(variant_id, resource_type='image', type=resource.type, format=format)
+
+    def path(self, public_id, resource_type='image', type='upload', format=None):
+        relative = f'{public_id}.{format}' if format else public_id
+        return os.path.join(self.root, resource_type, type, *relative.split('/'))
+
+    def resource(self, result, default_resource_type='image'):
+        return LocalResource(metadata=result, default_resource_type=default_resource_type)
+
+    def wrap(self, resource):
+        return LocalResource(
+            public_id=resource.public_id, format=resource.format, version=resource.version,
+            type=resource.type, resource_type=resource.resource_type,
+        )
+
+    def _write(self, file, path):
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, 'rb') as src:
+                data = src.read()
+            with open(path, 'wb') as dst:
+                dst.write(data)
+            return len(data)
+
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        size = 0
+        with open(path, 'wb') as dst:
+            chunks = file.chunks() if hasattr(file, 'chunks') else iter(lambda: file.read(64 * 1024), b'')
+            for chunk in chunks:
+                dst.write(chunk)
+                size += len(chunk)
+        return size
+
+
+MEDIA_BACKENDS = {
+    'cloudinary': 'core.storage.CloudinaryMediaStorage',
+    'local': 'core.storage.LocalMediaStorage',
+}
+
+
+@lru_cache(maxsize=None)
+def _load_media_storage(backend):
+    return import_string(MEDIA_BACKENDS.get(backend, backend))()
+
+
+def get_media_storage():
+    """Return the media storage backend selected by settings.MEDIA_BACKEND"""
+    return _load_media_storage(getattr(settings, 'MEDIA_BACKEND', 'cloudinary'))
@@ -0,0 +1,58 @@
+import hashlib
+
+from django import template
+from django.conf import settings
+
+from core.cache import CacheNamespace
+
+register = template.Library()
+
+FRAGMENT_CACHE = CacheNamespace(f'fragments-{settings.RELEASE}', timeout=settings.FRAGMENT_CACHE_SECONDS)
+
+
+def data_version(groups):
+    """Generations of the named cache namespaces; any invalidate() changes the result."""
+    return [str(CacheNamespace(group).generation()) for group in groups.split(',') if group]
+
+
+class CachedFragmentNode(template.Node):
+
+    def __init__(self, nodelist, name, vary_on, depends):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+        self.depends = depends
+
+    def render(self, context):
+        vary = [str(var.resolve(context)) for var in self.vary_on]
+        if self.depends is not None:
+            vary += data_version(self.depends.resolve(context))
+        digest = hashlib.md5(':'.join(vary).encode()).hexdigest()
+        key = f'{self.name.resolve(context)}:{digest}'
+        return FRAGMENT_CACHE.get_or_set(key, lambda: self.nodelist.render(context))
+
+
+@register.tag
+def cachedfragment(parser, token):
+    """
+    Cache the enclosed markup by name, the given values (typically the user)
+    and the data version of the cache namespaces named in ``depends``.
+    Usage:
+        {% cachedfragment "subject-options" request.user.pk depends="subject-lists" %}
+            ...
+        {% endcachedfragment %}
+    Never put {% csrf_token %} or other per-request output inside.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires at least a fragment name")
+    depends = None
+    vary_on = []
+    for bit in bits[2:]:
+        if bit.startswith('depends='):
+            depends = parser.compile_filter(bit[len('depends='):])
+        else:
+            vary_on.append(parser.compile_filter(bit))
+    nodelist = parser.parse(('endcachedfragment',))
+    parser.delete_first_token()
+    return CachedFragmentNode(nodelist, parser.compile_filter(bits[1]), vary_on, depends)
@@ -0,0 +1,45 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from core.images import image_variants, srcset
+
+register = template.Library()
+
+
+def _parse_widths(widths):
+    if isinstance(widths, str):
+        return [int(w) for w in widths.split(',') if w.strip()]
+    return widths
+
+
+@register.simple_tag
+def image_srcset(image, widths=None, format='webp'):
+    """
+    srcset value for an image field.
+    Usage: <img srcset="{% image_srcset course.image %}" ...>
+    """
+    return srcset(image_variants(image, _parse_widths(widths), format))
+
+
+@register.simple_tag
+def responsive_img(image, alt='', sizes='100vw', widths=None, **attrs):
+    """
+    <picture> with a WebP source and a JPEG <img> fallback, both width-bounded.
+    Usage: {% responsive_img course.image alt=course.title sizes="(max-width: 576px) 100vw, 33vw" class="card-img-top" %}
+    """
+    if not image:
+        return ''
+    widths = _parse_widths(widths)
+    webp = image_variants(image, widths, 'webp')
+    jpeg = image_variants(image, widths, 'jpg')
+    extra = format_html_join(' ', '{}="{}"', sorted(attrs.items()))
+    if not jpeg:
+        return format_html('<img src="{}" alt="{}" loading="lazy" decoding="async" {}>', image.url, alt, extra)
+
+    # The middle width is a sensible default for browsers that ignore srcset
+    fallback = jpeg[sorted(jpeg)[len(jpeg) // 2]]
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" loading="lazy" decoding="async" {}></picture>',
+        srcset(webp), sizes, fallback, srcset(jpeg), sizes, alt, extra,
+    )
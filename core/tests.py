@@ -1,3 +1,113 @@
-from django.test import TestCase
+import threading
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from .db_router import _use_replica, read_replica
+from . import profiling
+from .models import OutboundEmail
+from .slow_queries import SlowStatement, stored_params
+from .templatetags import media_tags
+
+
+class ReadReplicaTests(SimpleTestCase):
+
+    def test_decorator_is_safe_across_threads(self):
+        both_inside = threading.Barrier(2, timeout=5)
+        errors, after = [], []
+
+        @read_replica()
+        def view():
+            both_inside.wait()
+            return _use_replica.get()
+
+        def run():
+            try:
+                self.assertTrue(view())
+            except Exception as e:
+                errors.append(e)
+            after.append(_use_replica.get())
+
+        threads = [threading.Thread(target=run) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(after, [False, False])
+
+    def test_context_manager_restores_previous_value(self):
+        with read_replica():
+            with read_replica():
+                self.assertTrue(_use_replica.get())
+            self.assertTrue(_use_replica.get())
+        self.assertFalse(_use_replica.get())
+
+
+@override_settings(METRICS_TOKEN='test-token', METRICS_MULTIPROCESS_DIR=None)
+class MetricsTests(TestCase):
+
+    def test_outbox_backlog_gauge(self):
+        OutboundEmail.objects.create(key='pending-1', to='a@example.com', subject='A', body='A')
+        OutboundEmail.objects.create(key='pending-2', to='b@example.com', subject='B', body='B')
+        OutboundEmail.objects.create(key='sent', to='c@example.com', subject='C', body='C', sent_at=timezone.now())
+        OutboundEmail.objects.create(key='dead', to='d@example.com', subject='D', body='D',
+                                     attempts=settings.OUTBOX_MAX_ATTEMPTS)
+
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer test-token')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('# TYPE siat_outbox_pending gauge\nsiat_outbox_pending 2\n', response.content.decode())
+        self.assertIn('# TYPE siat_outbox_dead gauge\nsiat_outbox_dead 1\n', response.content.decode())
+
+
+class ResponsiveImgTests(SimpleTestCase):
+
+    def test_fallback_keeps_attributes(self):
+        image = mock.Mock(url='/media/course.png')
+        with mock.patch.object(media_tags, 'image_variants', return_value={}):
+            html = media_tags.responsive_img(image, alt='Course', **{'class': 'card-img-top', 'style': 'height: 200px;'})
+        self.assertEqual(html, '<img src="/media/course.png" alt="Course" loading="lazy" decoding="async" '
+                               'class="card-img-top" style="height: 200px;">')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Only PostgreSQL SELECTs are stored for EXPLAIN')
+class SlowQueryParamsTests(SimpleTestCase):
+
+    def statement(self, sql, params):
+        return SlowStatement(0.5, sql, params, False, '', 'default')
+
+    def test_select_params_are_stored(self):
+        statement = self.statement('SELECT * FROM "student_portal_assignment" WHERE "id" = %s', (7,))
+        self.assertEqual(stored_params(statement), '[7]')
+
+    def test_session_and_user_params_are_not_stored(self):
+        session = self.statement('SELECT * FROM "django_session" WHERE "session_key" = %s', ('secret',))
+        user = self.statement('SELECT * FROM "auth_user" WHERE "username" = %s', ('someone',))
+        self.assertEqual(stored_params(session), '')
+        self.assertEqual(stored_params(user), '')
+
+
+class ProfilingMiddlewareTests(SimpleTestCase):
+
+    def test_overlapping_profiled_request_is_served_unprofiled(self):
+        middleware = profiling.ProfilingMiddleware(lambda request: HttpResponse('ok'))
+        request = RequestFactory().get('/')
+        with mock.patch.object(profiling, 'profile_requested_by', return_value='admin'), profiling._profiling:
+            response = middleware(request)
+        self.assertEqual(response.content, b'ok')
+        self.assertNotIn('X-Siat-Profile-Id', response)
+
+    def test_request_is_served_when_another_profiler_is_active(self):
+        middleware = profiling.ProfilingMiddleware(lambda request: HttpResponse('ok'))
+        request = RequestFactory().get('/')
+        with mock.patch.object(profiling, 'profile_requested_by', return_value='admin'), \
+                mock.patch('cProfile.Profile.enable', side_effect=ValueError('Another profiling tool is already active')):
+            response = middleware(request)
+        self.assertEqual(response.content, b'ok')
+        self.assertFalse(profiling._profiling.locked())
@@ -0,0 +1,134 @@
+"""
+Streaming upload guard.
+
+Django only exposes ``file.size`` once the whole body has been buffered or
+spooled to disk. This handler runs ahead of the default handlers and checks
+each file while the multipart body is still being read: the first bytes are
+sniffed against known file signatures and the running size is compared to the
+limit configured for the endpoint in ``settings.UPLOAD_RULES``. Offending
+uploads are aborted after the first chunk and the reason is left on the request
+for the view to report.
+"""
+import re
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+
+
+MB = 1024 * 1024
+
+# Allowance for the non-file form fields sharing the request body.
+FORM_OVERHEAD = 64 * 1024
+
+# Bytes needed before a file type can be decided.
+SNIFF_BYTES = 12
+
+# Leading bytes per file type as (offset, bytes) pairs that must all match.
+# Office Open XML formats (docx, pptx, xlsx) are zip containers.
+FILE_SIGNATURES = {
+    'pdf': [((0, b'%PDF-'),)],
+    'doc': [((0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'),)],
+    'docx': [((0, b'PK\x03\x04'),)],
+    'pptx': [((0, b'PK\x03\x04'),)],
+    'zip': [((0, b'PK\x03\x04'),), ((0, b'PK\x05\x06'),)],
+    'jpg': [((0, b'\xff\xd8\xff'),)],
+    'png': [((0, b'\x89PNG\r\n\x1a\n'),)],
+    'gif': [((0, b'GIF87a'),), ((0, b'GIF89a'),)],
+    'webp': [((0, b'RIFF'), (8, b'WEBP'))],
+}
+
+
+def sniff_type(head, allowed):
+    """Return the first allowed type whose signature matches ``head``, else None"""
+    for kind in allowed:
+        for signature in FILE_SIGNATURES.get(kind, ()):
+            if all(head[offset:offset + len(magic)] == magic for offset, magic in signature):
+                return kind
+    return None
+
+
+def get_upload_rule(path):
+    """Return the upload rule for a request path, or None if uploads are unrestricted"""
+    for pattern, rule in getattr(settings, 'UPLOAD_RULES', ()):
+        if re.match(pattern, path):
+            return rule
+    return None
+
+
+def request_size_limit(rule):
+    """Largest valid total of the files in one request: max_request_size, else max_size per file field"""
+    return rule.get('max_request_size', rule['max_size'] * rule.get('max_files', 1))
+
+
+def upload_errors(request):
+    """Rejections recorded by GuardedUploadHandler, keyed by form field name"""
+    return getattr(request, 'upload_errors', {})
+
+
+def add_upload_errors(request, form):
+    """Copy streaming-upload rejections onto a bound form as field errors"""
+    for field, message in upload_errors(request).items():
+        form.add_error(field if field in form.fields else None, message)
+
+
+class GuardedUploadHandler(FileUploadHandler):
+    """
+    Rejects oversized or wrong-type files while the request streams.
+
+    Must be listed before the memory/temporary-file handlers in
+    FILE_UPLOAD_HANDLERS so chunks are checked before they are stored.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.rule = get_upload_rule(self.request.path)
+        self.body_length = content_length
+        # Returning None lets the regular multipart parser carry on.
+        return None
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.head = b''
+        self.sniffed = False
+        if not self.rule:
+            return
+        # A body larger than every file at its limit plus the other form
+        # fields cannot be valid: stop before reading a single byte of it.
+        # Each file's own size is checked in receive_data_chunk.
+        limit = request_size_limit(self.rule)
+        if self.body_length and self.body_length > limit + FORM_OVERHEAD:
+            self.reject(f"Upload too large. Max allowed per request is {limit / MB:g}MB. "
+                        f"Your upload: {self.body_length / MB:.2f}MB")
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.rule:
+            return raw_data
+
+        max_size = self.rule['max_size']
+        if start + len(raw_data) > max_size:
+            self.reject(f"File too large. Max allowed is {max_size / MB:g}MB.")
+
+        if not self.sniffed:
+            self.head += raw_data[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES:
+                self.check_type()
+        return raw_data
+
+    def file_complete(self, file_size):
+        # Files shorter than SNIFF_BYTES still need their type checked.
+        if self.rule and not self.sniffed:
+            self.check_type()
+        return None
+
+    def check_type(self):
+        self.sniffed = True
+        allowed = self.rule['types']
+        if not sniff_type(self.head, allowed):
+            self.reject(f"Unsupported file type. Allowed: {', '.join(allowed)}.")
+
+    def reject(self, message):
+        if not hasattr(self.request, 'upload_errors'):
+            self.request.upload_errors = {}
+        self.request.upload_errors[self.field_name] = message
+        # connection_reset leaves the rest of the body unread instead of
+        # draining it, which is the whole point of rejecting early.
+        raise StopUpload(connection_reset=True)
@@ -1,9 +1,18 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import Course, ContactInfo
-from admin_panel.models import AboutSection
+from .models import Course
 from django.core.mail import send_mail
 from django.conf import settings
 from .forms import EnrollmentForm, ContactForm
+from .uploads import add_upload_errors
+from .metrics import REGISTRY
+from .site_config import get_site_config
+from django.http import Http404, HttpResponse, JsonResponse
+from django.db import connection
+from django.template.loader import get_template
+from django.urls import get_resolver
+from django.views.decorators.http import require_GET
+import time
+from django.utils.crypto import constant_time_compare
 
 
 def home(request):
@@ -20,9 +29,8 @@ def home(request):
     return render(request, 'home.html', context)
 
 def about(request):
-    sections = AboutSection.objects.all()
     context = {
-        'sections': sections,
+        'sections': get_site_config().about_sections,
         'site_description': 'Learn about our vision, mission, and commitment to quality education at SIAT.',
         'keywords': 'SIAT vision, mission, applied sciences institute',
     }
@@ -45,6 +53,7 @@ def enroll(request, course_slug=None):
         course = get_object_or_404(Course, slug=course_slug)
     if request.method == 'POST':
         form = EnrollmentForm(request.POST, request.FILES)  # Handle file uploads
+        add_upload_errors(request, form)
         if form.is_valid():
             application = form.save(commit=False)
             if course:
@@ -96,15 +105,43 @@ def contact(request):
     else:
         form = ContactForm()
     
-    info = {
-        'phone': '+260 076 251632',
-        'email': 'sunriseinstituteofapplied21@gmail.com',
-        'address': 'Sunrise Institute, Monze, Zambia',  # Placeholder from PDF/phone
-    }
     context = {
-        'info': info,
+        'info': get_site_config().contact,
         'form': form,
         'meta_description': 'Contact Sunrise Institute of Applied Sciences and Technology for inquiries on online courses, admissions, and more. Reach us via phone, email, or visit our address.',
         'meta_keywords': 'SIAT contact, sunrise institute Zambia, applied sciences inquiries, technology education support, diversity equity education contact',
     }
-    return render(request, 'contact.html', context)
\ No newline at end of file
+    return render(request, 'contact.html', context)
+
+
+def metrics(request):
+    """Prometheus scrape endpoint (see core.metrics)"""
+    header = request.headers.get('Authorization', '')
+    token = settings.METRICS_TOKEN
+    authorized = (token and constant_time_compare(header, f'Bearer {token}')) or request.user.is_staff
+    if not authorized:
+        raise Http404
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@require_GET
+def warmup(request):
+    """
+    Load what the first real request of a fresh instance would otherwise pay
+    for: the database connection, the URL resolver, the compiled templates of
+    the busiest pages and the current semester. Safe to hit repeatedly.
+    """
+    from student_portal.semesters import get_current_semester
+
+    timings = {}
+
+    def step(name, func):
+        start = time.perf_counter()
+        func()
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    step('db', connection.ensure_connection)
+    step('urls', lambda: get_resolver().reverse_dict)
+    step('templates', lambda: [get_template(name) for name in settings.WARMUP_TEMPLATES])
+    step('semester', get_current_semester)
+    return JsonResponse({'status': 'warm', 'ms': timings})
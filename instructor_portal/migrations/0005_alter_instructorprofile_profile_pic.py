@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-19 11:05
+
+import core.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('instructor_portal', '0004_alter_instructorprofile_courses_taught_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='instructorprofile',
+            name='profile_pic',
+            field=core.fields.MediaField(blank=True, max_length=255, null=True, verbose_name='profile_pic'),
+        ),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
-from cloudinary.models import CloudinaryField
+from core.fields import MediaField
 from core.models import Course, Department
 
 class InstructorProfile(models.Model):
@@ -8,7 +8,7 @@ class InstructorProfile(models.Model):
     full_name = models.CharField(max_length=200, default='Instructor Name')
     email = models.EmailField(default='instructor@example.com')
     phone = models.CharField(max_length=20, default='0000000000')
-    profile_pic = CloudinaryField('profile_pic', blank=True, null=True)
+    profile_pic = MediaField('profile_pic', blank=True, null=True)
     courses_taught = models.ManyToManyField(Course, related_name='instructors', blank=True)
     department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True, related_name='instructors')
 
@@ -1,3 +1,87 @@
-from django.test import TestCase
+import contextvars
+import io
+import zipfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+
+from .utils import expand_batch_files, upload_files_concurrently
+
+PDF = b'%PDF-1.4\n' + b'0' * 100
+
+
+def zip_upload(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return SimpleUploadedFile('materials.zip', buffer.getvalue())
+
+
+@override_settings(UPLOAD_MAX_SIZE=1024, UPLOAD_BATCH_MAX_SIZE=4096, DATA_UPLOAD_MAX_NUMBER_FILES=100)
+class ExpandBatchFilesTests(SimpleTestCase):
+
+    def test_zip_members_are_extracted_and_checked(self):
+        files, invalid, over_limit = expand_batch_files([zip_upload({
+            'week1.pdf': PDF, 'notes.txt': b'plain text', 'huge.pdf': PDF + b'0' * 2048,
+        })])
+        self.assertEqual([(file.name, file.size, file.read()) for file in files], [('week1.pdf', len(PDF), PDF)])
+        self.assertEqual(sorted(invalid), ['huge.pdf', 'notes.txt'])
+        self.assertEqual(over_limit, [])
+
+    @override_settings(DATA_UPLOAD_MAX_NUMBER_FILES=3)
+    def test_files_past_the_count_cap_are_reported_separately(self):
+        files, invalid, over_limit = expand_batch_files([
+            zip_upload({f'week{i}.pdf': PDF for i in range(1, 3)}),
+            SimpleUploadedFile('week3.pdf', PDF),
+            zip_upload({'week4.pdf': PDF}),
+            SimpleUploadedFile('week5.pdf', PDF),
+        ])
+        self.assertEqual([file.name for file in files], ['week1.pdf', 'week2.pdf', 'week3.pdf'])
+        self.assertEqual(invalid, [])
+        self.assertEqual(over_limit, ['week4.pdf', 'week5.pdf'])
+
+    @override_settings(UPLOAD_BATCH_MAX_SIZE=2500)
+    def test_extracted_total_is_capped(self):
+        member = PDF + b'0' * (1000 - len(PDF))
+        files, invalid, over_limit = expand_batch_files([
+            zip_upload({'a.pdf': member, 'b.pdf': member}),
+            zip_upload({'c.pdf': member, 'd.pdf': PDF}),
+        ])
+        # c.pdf would take the total to 3000 bytes; the small d.pdf still fits
+        self.assertEqual([file.name for file in files], ['a.pdf', 'b.pdf', 'd.pdf'])
+        self.assertEqual(invalid, [])
+        self.assertEqual(over_limit, ['c.pdf'])
+
+    def test_unreadable_zip_is_skipped(self):
+        # Set the "encrypted" flag bit in the local and central headers of the member
+        encrypted = bytearray(zip_upload({'secret.pdf': PDF}).read())
+        encrypted[6] |= 0x1
+        encrypted[encrypted.index(b'PK\x01\x02') + 8] |= 0x1
+
+        files, invalid, over_limit = expand_batch_files([
+            SimpleUploadedFile('broken.zip', b'PK\x03\x04garbage' * 10),
+            SimpleUploadedFile('encrypted.zip', bytes(encrypted)),
+            SimpleUploadedFile('week1.pdf', PDF),
+        ])
+        self.assertEqual([file.name for file in files], ['week1.pdf'])
+        self.assertEqual(invalid, ['broken.zip', 'encrypted.zip'])
+        self.assertEqual(over_limit, [])
+
+
+class UploadFilesConcurrentlyTests(SimpleTestCase):
+
+    def test_uploads_see_the_callers_context(self):
+        request_id = contextvars.ContextVar('request_id', default=None)
+        storage = mock.Mock()
+        storage.upload.side_effect = lambda file, **options: {'request': request_id.get(), 'name': file.name}
+        files = [SimpleUploadedFile(f'{i}.pdf', PDF) for i in range(4)]
+
+        request_id.set('abc')
+        with mock.patch('instructor_portal.utils.get_media_storage', return_value=storage), \
+                override_settings(MATERIAL_UPLOAD_WORKERS=2):
+            results = upload_files_concurrently(files)
+
+        self.assertEqual([result for _, result, _ in results],
+                         [{'request': 'abc', 'name': f'{i}.pdf'} for i in range(4)])
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import dashboard, materials, assignments, submissions, grading, monitoring, instructor_logout, download_pdf, delete_assignment
+from .views import dashboard, materials, batch_materials, assignments, submissions, grading, monitoring, instructor_logout, download_pdf, delete_assignment
 from .views_auth import InstructorLoginView
 
 app_name = 'instructor_portal'
@@ -7,6 +7,7 @@ urlpatterns = [
     path('login/', InstructorLoginView.as_view(), name='instructor_login'),
     path('', dashboard, name='dashboard'),
     path('materials/', materials, name='materials'),
+    path('materials/batch/', batch_materials, name='batch_materials'),
     path('assignments/', assignments, name='assignments'),
     path('submissions/', submissions, name='submissions'),
     path('grading/', grading, name='grading'),
@@ -0,0 +1,153 @@
+"""
+Utility functions for instructor portal
+"""
+import contextvars
+import os
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+
+from core.storage import get_media_storage
+from core.uploads import sniff_type, SNIFF_BYTES
+
+
+def title_from_filename(name):
+    """'week_01-intro.pdf' -> 'Week 01 Intro'"""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return ' '.join(stem.replace('_', ' ').replace('-', ' ').split()).title()[:200]
+
+
+def extract_member(archive, info, allowed_types):
+    """
+    Stream a zip member into a temporary file, checking its type from the
+    first bytes and its real size while decompressing (the size in the zip
+    header can lie). Returns the file, or None if it is not allowed.
+    """
+    with archive.open(info) as member:
+        head = member.read(SNIFF_BYTES)
+        if not sniff_type(head, allowed_types):
+            return None
+        extracted = TemporaryUploadedFile(os.path.basename(info.filename), 'application/octet-stream', 0, None)
+        extracted.write(head)
+        size = len(head)
+        for chunk in iter(lambda: member.read(64 * 1024), b''):
+            size += len(chunk)
+            if size > settings.UPLOAD_MAX_SIZE:
+                extracted.close()
+                return None
+            extracted.write(chunk)
+    extracted.size = size
+    extracted.seek(0)
+    return extracted
+
+
+def expand_zip(upload, allowed_types, max_files, max_size):
+    """
+    Extract the allowed members of one zip archive, at most ``max_files``
+    of them and ``max_size`` bytes in total.
+
+    Returns:
+        (files, invalid, over_limit) as for expand_batch_files
+    """
+    import zipfile
+
+    files, invalid, over_limit = [], [], []
+    extracted_size = 0
+    try:
+        with zipfile.ZipFile(upload) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or os.path.basename(info.filename).startswith('.'):
+                    continue
+                if info.file_size > settings.UPLOAD_MAX_SIZE:
+                    invalid.append(info.filename)
+                    continue
+                if len(files) >= max_files or extracted_size + info.file_size > max_size:
+                    over_limit.append(info.filename)
+                    continue
+                extracted = extract_member(archive, info, allowed_types)
+                if extracted is None:
+                    invalid.append(info.filename)
+                elif extracted_size + extracted.size > max_size:
+                    extracted.close()
+                    over_limit.append(info.filename)
+                else:
+                    extracted_size += extracted.size
+                    files.append(extracted)
+    except Exception:
+        # Remove the temporary files of members extracted before the archive turned out unreadable
+        for file in files:
+            file.close()
+        raise
+    return files, invalid, over_limit
+
+
+def expand_batch_files(files, allowed_types=('pdf',)):
+    """
+    Flatten uploaded files and zip archives into a list of material files.
+
+    Zip members are streamed to temporary files, never held in memory whole.
+    Members that are not of an allowed type or are larger than UPLOAD_MAX_SIZE
+    are skipped as invalid, and so is a whole archive that is corrupt or
+    encrypted. Files past the per-request file cap, and members that would
+    take the extracted total over UPLOAD_BATCH_MAX_SIZE, are skipped as over
+    the limit.
+
+    Returns:
+        (files, invalid, over_limit) where the last two are lists of names that were left out
+    """
+    import zipfile
+    import zlib
+
+    max_files = settings.DATA_UPLOAD_MAX_NUMBER_FILES or 100
+    collected, invalid, over_limit = [], [], []
+    extracted_size = 0
+
+    for upload in files:
+        head = upload.read(SNIFF_BYTES)
+        upload.seek(0)
+        if sniff_type(head, ['zip']):
+            try:
+                members, skipped, capped = expand_zip(
+                    upload, allowed_types, max_files - len(collected), settings.UPLOAD_BATCH_MAX_SIZE - extracted_size,
+                )
+            except (zipfile.BadZipFile, RuntimeError, zlib.error, EOFError):
+                # Not a readable zip (corrupt, truncated or encrypted): skip the archive, keep the rest of the batch
+                invalid.append(upload.name)
+                continue
+            collected += members
+            extracted_size += sum(member.size for member in members)
+            invalid += skipped
+            over_limit += capped
+        elif not sniff_type(head, allowed_types):
+            invalid.append(upload.name)
+        elif len(collected) >= max_files:
+            over_limit.append(upload.name)
+        else:
+            collected.append(upload)
+
+    return collected, invalid, over_limit
+
+
+def upload_files_concurrently(files, **options):
+    """
+    Upload files to media storage through a bounded thread pool.
+    Storage uploads are network-bound, so they overlap well in threads.
+    Each upload runs in a copy of the caller's context, so ContextVars such
+    as the request's perf metrics are still visible in the worker threads.
+
+    Returns:
+        List of (file, upload_result, error) in the order the files were given
+    """
+    def upload_one(file):
+        try:
+            return file, get_media_storage().upload(file, **options), None
+        except Exception as e:
+            return file, None, e
+
+    if not files:
+        return []
+    from concurrent.futures import ThreadPoolExecutor
+    workers = min(settings.MATERIAL_UPLOAD_WORKERS, len(files))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, upload_one, file) for file in files]
+        return [future.result() for future in futures]
@@ -4,15 +4,21 @@ from student_portal.models import (
     SubjectEnrollment, LearningMaterial, Assignment, Submission, 
     CourseSubject, Semester, Subject, Notification, StudentProfile
 )
+from student_portal.notifications import notify_subject_students
+from student_portal.semesters import get_current_semester
+from student_portal.youtube import parse_youtube_url
 from .models import InstructorProfile
-from cloudinary.uploader import upload
-from cloudinary.utils import cloudinary_url
 from django.contrib import messages
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Avg
+from django.db.models import Count, Avg, Q
+from django.conf import settings
 import logging
 from .forms import CourseSubjectForm
+from .utils import expand_batch_files, upload_files_concurrently, title_from_filename
+from core.db_router import read_replica
+from core.storage import get_media_storage
+from core.uploads import upload_errors
 
 
 MAX_UPLOAD_SIZE_MB = 4.5
@@ -23,15 +29,16 @@ logger = logging.getLogger(__name__)
 
 
 @login_required(login_url='/instructor/login/')
+@read_replica()
 def dashboard(request):
     if request.session.get("portal") != "instructor":
         logout(request)
         return redirect("instructor_portal:instructor_login")
     
-    profile = get_object_or_404(InstructorProfile, user=request.user)
+    profile = request.instructor
     
     # Get subjects assigned to this instructor
-    current_semester = Semester.objects.filter(is_current=True).first()
+    current_semester = get_current_semester()
     course_subjects = CourseSubject.objects.filter(
         instructor=profile,
         semester=current_semester
@@ -41,7 +48,7 @@ def dashboard(request):
         id__in=course_subjects.values_list('subject_id', flat=True)
     ).annotate(
         num_enrolled=Count('coursesubject__enrollments'),
-        avg_score=Avg('assignments__submission__score')
+        avg_score=Avg('assignments__submission__score', filter=Q(assignments__submission__is_latest=True))
     )
 
     # Get 3 latest submissions for subjects this instructor teaches
@@ -60,8 +67,8 @@ def dashboard(request):
 
 @login_required(login_url='/instructor/login/')
 def materials(request):
-    profile = get_object_or_404(InstructorProfile, user=request.user)
-    current_semester = Semester.objects.filter(is_current=True).first()
+    profile = request.instructor
+    current_semester = get_current_semester()
     course_subjects = CourseSubject.objects.filter(
         instructor=profile,
         semester=current_semester
@@ -69,6 +76,12 @@ def materials(request):
     subjects = Subject.objects.filter(id__in=course_subjects.values_list('subject_id', flat=True))
 
     if request.method == 'POST':
+        rejected = upload_errors(request)
+        if rejected:
+            for error in rejected.values():
+                messages.error(request, error)
+            return redirect('instructor_portal:materials')
+
         subject_id = request.POST.get('subject_id')
         subject = get_object_or_404(Subject, id=subject_id)
         title = request.POST.get('title')
@@ -87,39 +100,20 @@ def materials(request):
                     messages.error(request, "Please provide a YouTube link for video materials.")
                     return redirect('instructor_portal:materials')
                 # Enforce YouTube-only URLs
-                url_l = video_url.lower()
-                is_youtube = (
-                    url_l.startswith('https://www.youtube.com/watch') or
-                    url_l.startswith('http://www.youtube.com/watch') or
-                    url_l.startswith('https://youtube.com/watch') or
-                    url_l.startswith('http://youtube.com/watch') or
-                    url_l.startswith('https://youtu.be/') or
-                    url_l.startswith('http://youtu.be/')
-                )
-                if not is_youtube:
+                if not parse_youtube_url(video_url):
                     messages.error(request, "Only YouTube links are allowed for video materials (e.g., https://www.youtube.com/watch?v=... or https://youtu.be/...).")
                     return redirect('instructor_portal:materials')
                 material = LearningMaterial.objects.create(
                     subject=subject, title=title, type='video', video_url=video_url
                 )
                 
-                course_ids = CourseSubject.objects.filter(
-                    subject=subject,
-                    semester__is_current=True
-                ).values_list('course_id', flat=True)
-                
-                students = StudentProfile.objects.filter(
-                    enrollment__course_id__in=course_ids
-                ).distinct()
-                
-                for student in students:
-                    Notification.objects.create(
-                        student=student,
-                        type='material',
-                        title=f'New Material: {title}',
-                        message=f'A new video has been uploaded for {subject.title}',
-                        link=f'/portal/materials/?subject_id={subject.id}'
-                    )
+                notify_subject_students(
+                    subject,
+                    type='material',
+                    title=f'New Material: {title}',
+                    message=f'A new video has been uploaded for {subject.title}',
+                    link=f'/portal/materials/?subject_id={subject.id}'
+                )
                 
                 messages.success(request, "Video link saved successfully.")
             else:
@@ -131,28 +125,18 @@ def materials(request):
                     messages.error(request, f"File too large. Max allowed is {MAX_UPLOAD_SIZE_MB}MB. Your file: {file.size/1024/1024:.2f}MB")
                     return redirect('instructor_portal:materials')
 
-                upload_result = upload(file, resource_type='raw')
+                upload_result = get_media_storage().upload(file, resource_type='raw')
                 material = LearningMaterial.objects.create(
                     subject=subject, title=title, type=material_type, file=upload_result.get('secure_url')
                 )
                 
-                course_ids = CourseSubject.objects.filter(
-                    subject=subject,
-                    semester__is_current=True
-                ).values_list('course_id', flat=True)
-                
-                students = StudentProfile.objects.filter(
-                    enrollment__course_id__in=course_ids
-                ).distinct()
-                
-                for student in students:
-                    Notification.objects.create(
-                        student=student,
-                        type='material',
-                        title=f'New Material: {title}',
-                        message=f'A new {material_type} has been uploaded for {subject.title}',
-                        link=f'/portal/materials/?subject_id={subject.id}'
-                    )
+                notify_subject_students(
+                    subject,
+                    type='material',
+                    title=f'New Material: {title}',
+                    message=f'A new {material_type} has been uploaded for {subject.title}',
+                    link=f'/portal/materials/?subject_id={subject.id}'
+                )
                 
                 messages.success(request, "Material uploaded successfully.")
         except Exception as e:
@@ -167,10 +151,79 @@ def materials(request):
         'materials': materials
     })
 
+@login_required(login_url='/instructor/login/')
+def batch_materials(request):
+    """Upload many files (or zip archives of files) as materials for one subject in a single request"""
+    if request.method != 'POST':
+        return redirect('instructor_portal:materials')
+
+    rejected = upload_errors(request)
+    if rejected:
+        for error in rejected.values():
+            messages.error(request, error)
+        return redirect('instructor_portal:materials')
+
+    profile = request.instructor
+    instructor_subjects = Subject.objects.filter(
+        coursesubject__instructor=profile,
+        coursesubject__semester__is_current=True,
+    ).distinct()
+    subject = get_object_or_404(instructor_subjects, id=request.POST.get('subject_id'))
+    material_type = request.POST.get('type', 'module')
+    if material_type not in ('outline', 'module'):
+        messages.error(request, "Batch uploads only support outlines and modules.")
+        return redirect('instructor_portal:materials')
+
+    files, skipped, over_limit = expand_batch_files(request.FILES.getlist('files'))
+    if not files:
+        messages.error(request, "Please upload at least one PDF file or a zip of PDF files.")
+        return redirect('instructor_portal:materials')
+
+    materials, failed = [], []
+    for file, upload_result, error in upload_files_concurrently(files, resource_type='raw'):
+        file.close()  # removes the temporary copy of an extracted zip member
+        if error:
+            logger.error(f"Batch material upload failed for {file.name}: {str(error)}")
+            failed.append(file.name)
+            continue
+        materials.append(LearningMaterial(
+            subject=subject,
+            title=title_from_filename(file.name),
+            type=material_type,
+            file=upload_result.get('secure_url'),
+        ))
+
+    LearningMaterial.objects.bulk_create(materials)
+
+    if materials:
+        # One notification per student for the whole batch, merged with any recent unread one
+        count = len(materials)
+        notify_subject_students(
+            subject,
+            type='material',
+            title=f'{count} New Material{"s" if count != 1 else ""}: {subject.title}',
+            message=f'{count} new {material_type}{"s" if count != 1 else ""} uploaded for {subject.title}',
+            link=f'/portal/materials/?subject_id={subject.id}',
+            count=count,
+        )
+        messages.success(request, f"{len(materials)} material(s) uploaded successfully.")
+    if failed:
+        messages.error(request, f"Failed to upload: {', '.join(failed)}")
+    if skipped:
+        messages.warning(request, f"Skipped (not a PDF, too large or an unreadable zip): {', '.join(skipped)}")
+    if over_limit:
+        messages.warning(
+            request,
+            f"Skipped (over the limit of {settings.DATA_UPLOAD_MAX_NUMBER_FILES or 100} files or "
+            f"{settings.UPLOAD_BATCH_MAX_SIZE // (1024 * 1024)}MB per upload): {', '.join(over_limit)}"
+        )
+
+    return redirect('instructor_portal:materials')
+
 @login_required(login_url='/instructor/login/')
 def assignments(request):
-    profile = get_object_or_404(InstructorProfile, user=request.user)
-    current_semester = Semester.objects.filter(is_current=True).first()
+    profile = request.instructor
+    current_semester = get_current_semester()
     course_subjects = CourseSubject.objects.filter(
         instructor=profile,
         semester=current_semester
@@ -179,6 +232,12 @@ def assignments(request):
     assignments = Assignment.objects.filter(subject__in=subjects)
     
     if request.method == 'POST':
+        rejected = upload_errors(request)
+        if rejected:
+            for error in rejected.values():
+                messages.error(request, error)
+            return redirect('instructor_portal:assignments')
+
         subject_id = request.POST.get('subject_id')
         subject = get_object_or_404(Subject, id=subject_id)
         title = request.POST.get('title')
@@ -195,29 +254,19 @@ def assignments(request):
                     messages.error(request, f"File too large. Max allowed is {MAX_UPLOAD_SIZE_MB}MB. Your file: {file.size/1024/1024:.2f}MB")
                     return redirect('instructor_portal:assignments')
                 
-                upload_result = upload(file, resource_type='raw')
+                upload_result = get_media_storage().upload(file, resource_type='raw')
                 assignment_data['file'] = upload_result.get('secure_url')
                 assignment_data['file_public_id'] = upload_result.get('public_id')
             
             assignment = Assignment.objects.create(**assignment_data)
             
-            course_ids = CourseSubject.objects.filter(
-                subject=subject,
-                semester__is_current=True
-            ).values_list('course_id', flat=True)
-            
-            students = StudentProfile.objects.filter(
-                enrollment__course_id__in=course_ids
-            ).distinct()
-            
-            for student in students:
-                Notification.objects.create(
-                    student=student,
-                    type='assignment',
-                    title=f'New Assignment: {title}',
-                    message=f'A new assignment has been posted for {subject.title}. Due: {due_date}',
-                    link='/portal/assignments/'
-                )
+            notify_subject_students(
+                subject,
+                type='assignment',
+                title=f'New Assignment: {title}',
+                message=f'A new assignment has been posted for {subject.title}. Due: {due_date}',
+                link='/portal/assignments/'
+            )
             
             messages.success(request, "Assignment created successfully.")
         except Exception as e:
@@ -240,7 +289,7 @@ def download_pdf(request, assignment_id):
         return redirect('instructor_portal:assignments')
 
     # Generate correct raw resource URL
-    url, options = cloudinary_url(
+    url = get_media_storage().url(
         assignment.file_public_id,
         resource_type='raw',
         type='upload',
@@ -249,8 +298,8 @@ def download_pdf(request, assignment_id):
 
 @login_required(login_url='/instructor/login/')
 def submissions(request):
-    profile = get_object_or_404(InstructorProfile, user=request.user)
-    current_semester = Semester.objects.filter(is_current=True).first()
+    profile = request.instructor
+    current_semester = get_current_semester()
     course_subjects = CourseSubject.objects.filter(
         instructor=profile,
         semester=current_semester
@@ -280,7 +329,10 @@ def submissions(request):
             messages.success(request, "Submission updated successfully.")
         return redirect('instructor_portal:submissions')
     
-    submissions = Submission.objects.filter(assignment__subject__in=subjects).order_by('-submitted_at')
+    # Only the latest submission of each student per assignment needs grading
+    submissions = Submission.objects.filter(
+        assignment__subject__in=subjects, is_latest=True
+    ).select_related('student', 'assignment__subject').order_by('-submitted_at')
     context = {
         'subjects': subjects,
         'submissions': submissions,
@@ -292,8 +344,8 @@ def submissions(request):
 def grading(request):
     from student_portal.models import Enrollment
     
-    profile = get_object_or_404(InstructorProfile, user=request.user)
-    current_semester = Semester.objects.filter(is_current=True).first()
+    profile = request.instructor
+    current_semester = get_current_semester()
     course_subjects = CourseSubject.objects.filter(
         instructor=profile,
         semester=current_semester
@@ -343,8 +395,8 @@ def grading(request):
 def monitoring(request):
     from student_portal.models import Enrollment
     
-    profile = get_object_or_404(InstructorProfile, user=request.user)
-    current_semester = Semester.objects.filter(is_current=True).first()
+    profile = request.instructor
+    current_semester = get_current_semester()
     course_subjects = CourseSubject.objects.filter(
         instructor=profile,
         semester=current_semester
@@ -375,7 +427,7 @@ def monitoring(request):
 
 @login_required(login_url='/instructor/login/')
 def assign_subjects(request):
-    profile = get_object_or_404(InstructorProfile, user=request.user)
+    profile = request.instructor
     if request.method == "POST":
         form = CourseSubjectForm(request.POST, user=request.user)
         if form.is_valid():
@@ -391,8 +443,8 @@ def assign_subjects(request):
 
 @login_required(login_url='/instructor/login/')
 def manage_subjects(request):
-    profile = get_object_or_404(InstructorProfile, user=request.user)
-    current_semester = Semester.objects.filter(is_current=True).first()
+    profile = request.instructor
+    current_semester = get_current_semester()
     subjects = CourseSubject.objects.filter(instructor=profile, semester=current_semester)
 
     return render(request, "instructor_portal/manage_subjects.html", {
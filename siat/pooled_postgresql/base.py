@@ -0,0 +1,144 @@
+"""
+PostgreSQL backend that borrows connections from an in-process psycopg2 pool.
+
+Meant for long-lived workers (runserver, gunicorn, management commands) where
+keeping a handful of TLS connections open beats reconnecting. Serverless
+deployments should keep the stock backend with CONN_MAX_AGE instead: each
+lambda has a single thread and Neon's pooler already multiplexes.
+
+Enable with ENGINE = 'siat.pooled_postgresql' and size the pool through
+OPTIONS['pool'] = {'min_size': 1, 'max_size': 10, 'timeout': 10,
+'check_idle_seconds': 10}: min_size connections are opened up front, up to
+max_size are kept open, a request waits up to timeout seconds for a free
+one, and connections idle longer than check_idle_seconds are pinged before
+reuse. Django's CONN_MAX_AGE should be 0 so connections go back to the pool
+at the end of each request.
+"""
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+from psycopg2.pool import PoolError
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.base import IsolationLevel
+from django.core.exceptions import ImproperlyConfigured
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """
+    At most max_size connections, all of which are kept open when returned.
+    getconn() waits up to ``timeout`` seconds for a free one, and pings a
+    connection that sat idle longer than ``check_idle_seconds`` before
+    handing it out again.
+    """
+
+    def __init__(self, conn_params, min_size, max_size, timeout, check_idle_seconds):
+        self.conn_params = conn_params
+        self.timeout = timeout
+        self.check_idle_seconds = check_idle_seconds
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._idle = []  # (connection, returned at); last in, first out
+        for _ in range(min_size):
+            self._idle.append((psycopg2.connect(**conn_params), time.monotonic()))
+
+    def healthy(self, connection, idle_since):
+        if connection.closed:
+            return False
+        if time.monotonic() - idle_since < self.check_idle_seconds:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError(f'No database connection became free within {self.timeout}s')
+        try:
+            while True:
+                with self._lock:
+                    idle = self._idle.pop() if self._idle else None
+                if idle is None:
+                    return psycopg2.connect(**self.conn_params)
+                if self.healthy(*idle):
+                    return idle[0]
+                # Dropped by the server while idle in the pool
+                idle[0].close()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, connection, close=False):
+        try:
+            if not close and not connection.closed:
+                status = connection.info.transaction_status
+                if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                    close = True
+                elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+            if close or connection.closed:
+                connection.close()
+            else:
+                with self._lock:
+                    self._idle.append((connection, time.monotonic()))
+        finally:
+            self._slots.release()
+
+
+def get_pool(alias, conn_params, options):
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = ConnectionPool(
+                conn_params,
+                min_size=options.get('min_size', 1),
+                max_size=options.get('max_size', 10),
+                timeout=options.get('timeout', 10),
+                check_idle_seconds=options.get('check_idle_seconds', 10),
+            )
+        return pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        self.pool_options = self.settings_dict['OPTIONS'].get('pool', {})
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = IsolationLevel(options.get('isolation_level', IsolationLevel.READ_COMMITTED))
+        except ValueError:
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level {options['isolation_level']} specified."
+            )
+
+        connection = get_pool(self.alias, conn_params, self.pool_options).getconn()
+
+        if 'isolation_level' in options:
+            connection.isolation_level = self.isolation_level
+        psycopg2.extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+        connection.cursor_factory = base.Cursor
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            pool = _pools.get(self.alias)
+            with self.wrap_database_errors:
+                if pool is None:
+                    return self.connection.close()
+                # putconn rolls back an open transaction and discards broken connections
+                pool.putconn(self.connection, close=self.connection.closed != 0)
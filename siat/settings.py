@@ -10,10 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
-import cloudinary
-import cloudinary.api
-import cloudinary.uploader
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -52,11 +50,16 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.perf.PerformanceMiddleware',
+    'core.profiling.ProfilingMiddleware',
+    'core.sessions.PortalSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'core.db_router.ReplicaPinningMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.portal_identity.PortalIdentityMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.site_config.PortalGateMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -73,6 +76,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.site_config',
             ],
         },
     },
@@ -112,8 +116,152 @@ DATABASES = {
         'PASSWORD': os.getenv('NEON_DB_PASSWORD', 'npg_D3pEQKdI5bNk'),
         'HOST': os.getenv('NEON_DB_HOST', 'ep-cool-hill-ad09ewm9-pooler.c-2.us-east-1.aws.neon.tech'),
         'PORT': os.getenv('NEON_DB_PORT', '5432'),
-        'OPTIONS': {'sslmode': 'require'},  # Neon requires SSL
+        # Reuse the TLS connection across requests instead of a fresh handshake each time;
+        # health checks drop connections the pooler closed while the lambda was frozen.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+        # The -pooler endpoint is pgbouncer in transaction mode, where named
+        # server-side cursors (.iterator()) do not survive between transactions.
+        'DISABLE_SERVER_SIDE_CURSORS': True,
+        'OPTIONS': {
+            'sslmode': 'require',  # Neon requires SSL
+            'connect_timeout': 5,
+            'keepalives': 1,
+            'keepalives_idle': 30,
+        },
+    }
+}
+
+# Long-lived workers can borrow from an in-process pool instead (see siat.pooled_postgresql)
+if os.getenv('DB_POOL') == '1':
+    DATABASES['default'].update({
+        'ENGINE': 'siat.pooled_postgresql',
+        'CONN_MAX_AGE': 0,
+    })
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        'check_idle_seconds': 10,
+    }
+
+# Optional read replica for dashboards and reports (see core.db_router)
+if os.getenv('NEON_REPLICA_DB_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('NEON_REPLICA_DB_NAME', DATABASES['default']['NAME']),
+        'USER': os.getenv('NEON_REPLICA_DB_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.getenv('NEON_REPLICA_DB_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': os.getenv('NEON_REPLICA_DB_HOST'),
+        'PORT': os.getenv('NEON_REPLICA_DB_PORT', DATABASES['default']['PORT']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        # Tests run against one database; the replica alias reads from it
+        'TEST': {'MIRROR': 'default'},
     }
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
+# After a write, the user's reads stay on the primary this long to cover replica lag
+REPLICA_PIN_SECONDS = 10
+
+# Per-request performance instrumentation (see core.perf): the share of
+# requests that get a Server-Timing header and a log line, and the duration
+# above which a request is always logged with its slowest SQL statements
+PERF_INSTRUMENTATION = os.getenv('PERF_INSTRUMENTATION', '1') == '1'
+PERF_SAMPLE_RATE = float(os.getenv('PERF_SAMPLE_RATE', '0.1'))
+PERF_SLOW_REQUEST_MS = int(os.getenv('PERF_SLOW_REQUEST_MS', '1000'))
+PERF_SLOW_SQL_LIMIT = 10
+
+# Single queries slower than SLOW_QUERY_MS are stored as SlowQuery rows (see
+# core.slow_queries). The slow_queries command adds EXPLAIN ANALYZE plans
+# outside of requests and deletes captures older than the retention.
+SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', '250'))
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = 5000
+SLOW_QUERY_RETENTION_DAYS = int(os.getenv('SLOW_QUERY_RETENTION_DAYS', '14'))
+# Tables (or table name prefixes) whose query parameters are secrets, such as
+# session keys and credentials; slow queries on them are stored without parameters
+SLOW_QUERY_REDACTED_TABLES = ('django_session', 'auth_')
+
+# Prometheus metrics at /metrics (see core.metrics). Scrapes authenticate with
+# "Authorization: Bearer <METRICS_TOKEN>" (staff sessions also work). With
+# several worker processes, point METRICS_MULTIPROCESS_DIR at a shared directory.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+METRICS_MULTIPROCESS_DIR = os.getenv('METRICS_MULTIPROCESS_DIR')
+METRICS_FLUSH_SECONDS = 5
+
+# On-demand request profiling (see core.profiling). Vercel only allows writes
+# under /tmp, so captures live on the instance that served the request.
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'siat-profiles'))
+PROFILE_MAX_CAPTURES = 50
+PROFILE_TOKEN_MAX_AGE = 60 * 60
+
+# Two-level cache (see core.cache): a per-process L1 in front of a shared L2.
+# The L2 is Redis when CACHE_REDIS_URL is set (needs the redis package) and a
+# file cache under CACHE_DIR otherwise. On Vercel, /tmp is per instance, so
+# only Redis is shared across instances there.
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL')
+CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'siat-cache'))
+CACHE_L1_SECONDS = 5
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TieredCache',
+        'OPTIONS': {'L1': 'local', 'L2': 'shared', 'L1_TIMEOUT': CACHE_L1_SECONDS},
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'siat-l1',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+    } if CACHE_REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+# Stampede protection: how long a recompute lock is held at most, and how
+# long other callers wait for the result before computing it themselves
+CACHE_LOCK_SECONDS = 10
+CACHE_LOCK_WAIT_SECONDS = 2
+
+# Cached template fragments (see core.templatetags.fragment_cache). Keys
+# include the release, so a deploy never serves markup of the previous one.
+# Without Redis each instance has its own cache and misses invalidations made
+# on other instances, so fragments are only kept briefly there.
+FRAGMENT_CACHE_SECONDS = 60 * 60 if CACHE_REDIS_URL else 60
+RELEASE = os.getenv('VERCEL_GIT_COMMIT_SHA', 'dev')[:12]
+
+# PortalSettings, ContactInfo and AboutSection are cached together this long (see core.site_config)
+SITE_CONFIG_CACHE_SECONDS = 300
+
+# Logged-in users' student/instructor profiles are cached this long (see core.portal_identity)
+PORTAL_PROFILE_CACHE_SECONDS = 300
+
+# The current semester is cached this long (see student_portal.semesters)
+CURRENT_SEMESTER_CACHE_SECONDS = 300
+
+# Templates compiled by /_warmup/ (see core.views.warmup), so the first page
+# a fresh serverless instance serves does not pay for parsing them
+WARMUP_TEMPLATES = [
+    'home.html', 'courses.html', 'about.html', 'contact.html',
+    'student_portal/dashboard.html', 'student_portal/courses.html', 'student_portal/assignments.html',
+    'student_portal/materials.html', 'student_portal/subject_detail.html',
+    'instructor_portal/dashboard.html', 'instructor_portal/assignments.html',
+    'instructor_portal/submissions.html', 'instructor_portal/materials.html',
+    'admin_panel/dashboard.html',
+]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'siat.perf': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
 }
 
 # Password validation
@@ -158,22 +306,60 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles_build', 'static')
 
 MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Media backend for uploads and delivery URLs (see core.storage):
+# 'cloudinary' in production, 'local' to keep files under MEDIA_ROOT for
+# offline load testing and benchmarking.
+MEDIA_BACKEND = os.environ.get('SIAT_MEDIA_BACKEND', 'cloudinary')
+LOCAL_MEDIA_BASE_URL = os.environ.get('SIAT_LOCAL_MEDIA_BASE_URL', 'http://127.0.0.1:8000')
+
+# Widths of the derivative images behind srcset (see core.images)
+RESPONSIVE_IMAGE_WIDTHS = [160, 320, 640, 1024]
+
+# Uploads are checked while the request body streams (see core.uploads).
+# The guard must come before the handlers that store the data.
+FILE_UPLOAD_HANDLERS = [
+    'core.uploads.GuardedUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Per-endpoint upload limits: (path regex, {'max_size': bytes, 'types': [...]}).
+# max_size applies to each file; forms with several file fields set max_files.
+# 4.5MB matches the Vercel request body limit.
+UPLOAD_MAX_SIZE = int(4.5 * 1024 * 1024)
+UPLOAD_BATCH_MAX_SIZE = int(os.environ.get('SIAT_UPLOAD_BATCH_MAX_SIZE', 25 * 1024 * 1024))
+UPLOAD_DOCUMENT_TYPES = ['pdf', 'doc', 'docx']
+UPLOAD_IMAGE_TYPES = ['jpg', 'png', 'gif', 'webp']
+UPLOAD_RULES = [
+    (r'^/portal/assignments/$', {'max_size': UPLOAD_MAX_SIZE, 'types': UPLOAD_DOCUMENT_TYPES}),
+    (r'^/portal/profile/$', {'max_size': UPLOAD_MAX_SIZE, 'types': UPLOAD_IMAGE_TYPES}),
+    (r'^/instructor/materials/$', {'max_size': UPLOAD_MAX_SIZE, 'types': ['pdf']}),
+    # Batch uploads carry many files; max_size still applies to each one
+    (r'^/instructor/materials/batch/$', {'max_size': UPLOAD_MAX_SIZE, 'max_request_size': UPLOAD_BATCH_MAX_SIZE,
+                                         'types': ['pdf', 'zip']}),
+    (r'^/instructor/assignments/$', {'max_size': UPLOAD_MAX_SIZE, 'types': UPLOAD_DOCUMENT_TYPES}),
+    # identity_document and secondary_results
+    (r'^/enroll/', {'max_size': UPLOAD_MAX_SIZE, 'max_files': 2, 'types': ['pdf'] + UPLOAD_IMAGE_TYPES}),
+    (r'^/admin_panel/(register-instructor|students/\d+/edit|instructors/\d+/edit)/$',
+     {'max_size': UPLOAD_MAX_SIZE, 'types': UPLOAD_IMAGE_TYPES}),
+]
+
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
-# Cloudinary Configuration (Get from Cloudinary dashboard)
+# Cloudinary Configuration (Get from Cloudinary dashboard). Applied to the SDK
+# by core.storage.configure_cloudinary() when the app registry is ready, so
+# loading settings does not import the SDK.
 CLOUDINARY_STORAGE = {
     'CLOUD_NAME': os.environ.get('CLOUDINARY_CLOUD_NAME', 'dvjkctnjx'),
     'API_KEY': os.environ.get('CLOUDINARY_API_KEY', '589682695274953'),
     'API_SECRET': os.environ.get('CLOUDINARY_API_SECRET', 'F_Gx43UgZw9lR2qrgnqBXllO66c'),
 }
 
-cloudinary.config(
-    cloud_name=os.environ.get('CLOUDINARY_CLOUD_NAME', 'dvjkctnjx'),
-    api_key=os.environ.get('CLOUDINARY_API_KEY','589682695274953'),
-    api_secret=os.environ.get('CLOUDINARY_API_SECRET', 'F_Gx43UgZw9lR2qrgnqBXllO66c'),
-    secure=True
-)
+# Concurrent storage uploads per batch material upload request
+MATERIAL_UPLOAD_WORKERS = 4
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -191,11 +377,36 @@ EMAIL_HOST_USER = 'sammyhills19@gmail.com'
 EMAIL_HOST_PASSWORD = 'theesamakahm'
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Emails queued in the outbox (core.outbox) are delivered by the send_outbox
+# command; a message is given up on after OUTBOX_MAX_ATTEMPTS failures. A run
+# claims its batch for OUTBOX_CLAIM_SECONDS; emails it did not get to (a
+# crash, a timeout) become sendable again after that.
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_CLAIM_SECONDS = 300
+
+# Unread notifications of the same type for a student and subject within
+# NOTIFICATION_COALESCE_MINUTES of each other are merged into one digest row
+# ("5 new materials in ..."); 0 turns merging off
+NOTIFICATION_COALESCE_MINUTES = int(os.getenv('NOTIFICATION_COALESCE_MINUTES', '60'))
+
+# send_due_reminders reminds students of assignments they have not submitted
+# when the due date is this many hours away (one reminder per window)
+DUE_REMINDER_WINDOWS_HOURS = [int(hours) for hours in os.getenv('DUE_REMINDER_WINDOWS_HOURS', '72,24').split(',')]
+
 # SEO Basics (We'll handle meta tags in templates)
 SITE_NAME = 'Sunrise Institute of Applied Sciences and Technology'
 SITE_DESCRIPTION = 'SUNRISE INSTITUTE OF APPLIED SCIENCES AND TECHNOLOGY and its board value and embrace diversity, equality and inclusion as fundamental to our mission to educate students for career success within a context of global citizenship and social justice. We recognize that historical and persistent inequalities and barriers to equitable participation exist and are well documented in society and within the college.',
 SITE_URL = 'www.sunrise-institute.net'
 
+# With Redis, sessions are read from the cache and written through to the
+# database. The file cache is per instance on Vercel, where a cached session
+# would outlive a logout made on another instance, so without Redis they
+# stay in the database only.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db' if CACHE_REDIS_URL else 'django.contrib.sessions.backends.db'
+# Shared cache only: an L1 copy could outlive a logout made on another instance
+SESSION_CACHE_ALIAS = 'shared'
+
 # Default
 SESSION_COOKIE_NAME = "siat_session"
 
@@ -203,3 +414,11 @@ SESSION_COOKIE_NAME = "siat_session"
 STUDENT_SESSION_COOKIE_NAME = "siat_student_session"
 INSTRUCTOR_SESSION_COOKIE_NAME = "siat_instructor_session"
 ADMIN_SESSION_COOKIE_NAME = "siat_admin_session"
+
+# URL prefix -> setting naming its session cookie (see core.sessions)
+PORTAL_SESSION_COOKIES = [
+    ('/portal/', 'STUDENT_SESSION_COOKIE_NAME'),
+    ('/instructor/', 'INSTRUCTOR_SESSION_COOKIE_NAME'),
+    ('/admin_panel/', 'ADMIN_SESSION_COOKIE_NAME'),
+    ('/metrics', 'ADMIN_SESSION_COOKIE_NAME'),
+]
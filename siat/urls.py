@@ -15,9 +15,10 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
+from django.views.static import serve
 from django.contrib.auth import views as auth_views
 from core import views as core_views
 
@@ -31,6 +32,8 @@ urlpatterns = [
     path('enroll/<slug:course_slug>/', core_views.enroll, name='enroll_course'),
     path('thank-you/', core_views.thank_you, name='thank_you'),
     path('contact/', core_views.contact, name='contact'),
+    path('metrics', core_views.metrics, name='metrics'),
+    path('_warmup/', core_views.warmup, name='warmup'),
      
     # path('accounts/login/', auth_views.LoginView.as_view(template_name='login.html', ), name='account_login'),  # New pattern
     
@@ -59,4 +62,7 @@ urlpatterns = [
 ]
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+if settings.MEDIA_BACKEND == 'local' and not settings.DEBUG:
+    # static() is a no-op without DEBUG; the local media backend still needs its files served
+    urlpatterns += [re_path(r'^media/(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT})]
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+A student's status on each assignment.
+
+with_status() annotates an Assignment queryset with the student's latest
+submission, in the same query:
+
+- ``submitted_at``, ``score``, ``grade``: of the latest submission
+  (``Submission.is_latest``), None when there is none
+- ``is_late``: the latest submission came after ``due_date``
+- ``status``: one of STATUSES, in order of precedence
+
+status_counts() groups the same statuses per subject in one query.
+"""
+from django.db.models import BooleanField, Case, CharField, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Now
+
+from .models import Submission
+
+
+STATUSES = {
+    'graded': 'Graded',
+    'late': 'Submitted late',
+    'submitted': 'Submitted',
+    'missing': 'Missing',
+    'pending': 'Not submitted',
+}
+
+
+def latest_submission(student, field):
+    return Subquery(
+        Submission.objects.filter(assignment=OuterRef('pk'), student=student, is_latest=True)
+        .values(field)[:1]
+    )
+
+
+def with_status(assignments, student):
+    return assignments.annotate(
+        submitted_at=latest_submission(student, 'submitted_at'),
+        score=latest_submission(student, 'score'),
+        grade=latest_submission(student, 'grade'),
+    ).annotate(
+        is_late=Case(
+            When(submitted_at__gt=F('due_date'), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+        status=Case(
+            When(Q(score__isnull=False) | Q(grade__gt=''), then=Value('graded')),
+            When(is_late=True, then=Value('late')),
+            When(submitted_at__isnull=False, then=Value('submitted')),
+            When(due_date__lt=Now(), then=Value('missing')),
+            default=Value('pending'),
+            output_field=CharField(),
+        ),
+    )
+
+
+def status_counts(assignments, student):
+    """{subject_id: {status: count}} over the given assignments."""
+    counts = {}
+    rows = (
+        with_status(assignments, student).order_by()
+        .values('subject_id', 'status').annotate(count=Count('id'))
+    )
+    for row in rows:
+        counts.setdefault(row['subject_id'], {})[row['status']] = row['count']
+    return counts
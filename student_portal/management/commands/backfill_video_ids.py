@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from student_portal.models import LearningMaterial
+
+
+class Command(BaseCommand):
+    help = ('Fill in the stored YouTube video id and embed URL of video materials (migration 0020 does this '
+            'once; use --all after changing the link parsing)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Materials updated per query',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-parse every material with a video link, not just those without a video id',
+        )
+
+    def handle(self, *args, **options):
+        materials = LearningMaterial.objects.exclude(video_url__isnull=True).exclude(video_url='')
+        if not options['all']:
+            materials = materials.filter(video_id='')
+        materials = materials.only('id', 'video_url', 'video_id', 'embed_url').order_by('id')
+
+        updated = 0
+        invalid = 0
+        batch = []
+        for material in materials.iterator(chunk_size=options['batch_size']):
+            material.set_video_fields()
+            if not material.video_id:
+                invalid += 1
+            batch.append(material)
+            if len(batch) >= options['batch_size']:
+                updated += LearningMaterial.objects.bulk_update(batch, ['video_id', 'embed_url'])
+                batch = []
+        if batch:
+            updated += LearningMaterial.objects.bulk_update(batch, ['video_id', 'embed_url'])
+
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} materials'))
+        if invalid:
+            self.stdout.write(self.style.WARNING(f'{invalid} video links are not YouTube video links'))
@@ -0,0 +1,90 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from instructor_portal.models import InstructorProfile
+from student_portal.models import (
+    StudentProfile, Semester, CourseSubject, Assignment, Submission,
+    LearningMaterial, Announcement, Notification, Enrollment,
+)
+
+INDEX_NODES = ('Index Scan', 'Index Only Scan', 'Bitmap Heap Scan')
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the main queries of the portal views and check they are served by index scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force-index',
+            action='store_true',
+            help='Disable sequential scans so small datasets still show whether an index is usable',
+        )
+
+    def handle(self, *args, **options):
+        semester = Semester.objects.filter(is_current=True).first()
+        student = StudentProfile.objects.filter(enrollment__isnull=False).first()
+        instructor = InstructorProfile.objects.filter(coursesubject__semester=semester).first()
+        submission = Submission.objects.select_related('assignment').first()
+        material = LearningMaterial.objects.filter(subject__isnull=False).first()
+        if not all([semester, student, instructor, submission, material]):
+            raise CommandError('Not enough data to explain against; seed a dataset first.')
+
+        course_ids = list(Enrollment.objects.filter(student=student).values_list('course_id', flat=True))
+        subject_ids = list(CourseSubject.objects.filter(
+            course_id__in=course_ids, semester=semester, is_active=True
+        ).values_list('subject_id', flat=True))
+        instructor_subject_ids = list(CourseSubject.objects.filter(
+            instructor=instructor, semester=semester
+        ).values_list('subject_id', flat=True))
+
+        checks = [
+            ('Student notifications (latest 10)',
+             Notification.objects.filter(student=student)[:10], Notification),
+            ('Student unread notification count',
+             Notification.objects.filter(student=student, is_read=False).values('pk'), Notification),
+            ('Student submissions for an assignment',
+             Submission.objects.filter(student=submission.student_id, assignment=submission.assignment_id), Submission),
+            ('Instructor latest submissions',
+             Submission.objects.filter(assignment__subject_id__in=instructor_subject_ids).order_by('-submitted_at')[:3],
+             Submission),
+            ('Student current-semester subjects',
+             CourseSubject.objects.filter(course_id__in=course_ids, semester=semester, is_active=True), CourseSubject),
+            ('Instructor current-semester subjects',
+             CourseSubject.objects.filter(instructor=instructor, semester=semester), CourseSubject),
+            ('Subject assignments by due date',
+             Assignment.objects.filter(subject_id__in=subject_ids or [0]).order_by('-due_date'), Assignment),
+            ('Subject materials of one type',
+             LearningMaterial.objects.filter(subject_id=material.subject_id, type=material.type).order_by('-created_at'),
+             LearningMaterial),
+            ('Dashboard announcements',
+             Announcement.objects.filter(subject_id__in=subject_ids or [0]).order_by('-created_at')[:5], Announcement),
+        ]
+
+        failures = 0
+        with transaction.atomic():
+            if options['force_index']:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for label, queryset, model in checks:
+                table = model._meta.db_table
+                plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+                nodes = [n for n in self.plan_nodes(plan) if n.get('Relation Name') == table]
+                scans = sorted({f"{n['Node Type']}{' using ' + n['Index Name'] if 'Index Name' in n else ''}"
+                                for n in nodes})
+                if any(n['Node Type'] == 'Seq Scan' for n in nodes) or not any(
+                        n['Node Type'] in INDEX_NODES for n in nodes):
+                    failures += 1
+                    self.stdout.write(self.style.ERROR(f'  ✗ {label}: {", ".join(scans) or "no scan on " + table}'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'  ✅ {label}: {", ".join(scans)}'))
+
+        if failures:
+            raise CommandError(f'{failures} of {len(checks)} queries are not using an index scan')
+        self.stdout.write(self.style.SUCCESS(f'All {len(checks)} queries use index scans'))
+
+    def plan_nodes(self, node):
+        yield node
+        for child in node.get('Plans', []):
+            yield from self.plan_nodes(child)
@@ -0,0 +1,330 @@
+import csv
+import io
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from core.models import School, Department, Course
+from instructor_portal.models import InstructorProfile
+from student_portal.models import (
+    StudentProfile, Enrollment, SubjectEnrollment, Semester, Subject, CourseSubject,
+    Assignment, Submission, LearningMaterial, Announcement, Notification,
+)
+from student_portal.semesters import forget_current_semester
+
+
+PRESETS = {
+    '1k': {'students': 1_000, 'courses': 20},
+    '10k': {'students': 10_000, 'courses': 60},
+    '100k': {'students': 100_000, 'courses': 200},
+}
+
+SEED_PREFIX = 'seed'
+SUBJECTS_PER_COURSE = 6
+ASSIGNMENTS_PER_SUBJECT = 5
+MATERIALS_PER_SUBJECT = 6
+ANNOUNCEMENTS_PER_SUBJECT = 3
+NOTIFICATIONS_PER_STUDENT = 20
+COPY_CHUNK = 50_000
+COPY_NULL = r'\N'
+GRADES = [(90, 'A'), (80, 'B'), (70, 'C'), (60, 'D'), (0, 'F')]
+
+
+def copy_insert(objs, chunk_size=COPY_CHUNK):
+    """
+    Insert unsaved model instances with COPY FROM STDIN on PostgreSQL
+    (bulk_create elsewhere). Only for leaf rows: primary keys are not returned.
+    """
+    objs = iter(objs)
+    total = 0
+    while True:
+        chunk = [obj for _, obj in zip(range(chunk_size), objs)]
+        if not chunk:
+            return total
+        model = type(chunk[0])
+        total += len(chunk)
+        if connection.vendor != 'postgresql':
+            model.objects.bulk_create(chunk, batch_size=5_000)
+            continue
+
+        fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in chunk:
+            # Explicit timestamps are kept; unset auto_now_add fields get "now" as on save()
+            values = (f.get_db_prep_save(f.pre_save(obj, getattr(obj, f.attname) is None), connection)
+                      for f in fields)
+            writer.writerow([COPY_NULL if value is None else value for value in values])
+        buffer.seek(0)
+        columns = ', '.join(connection.ops.quote_name(f.column) for f in fields)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) "
+                f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+                buffer,
+            )
+
+
+def grade_for(score):
+    return next(letter for floor, letter in GRADES if score >= floor)
+
+
+class Command(BaseCommand):
+    help = ('Populate the database with a deterministic synthetic dataset for scale testing. '
+            'Row contents depend only on --seed; dates are anchored to today so due-date logic stays meaningful.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=PRESETS, default='1k', help='Dataset size preset (number of students)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--replace', action='store_true', help='Delete a previously seeded dataset first')
+        parser.add_argument('--take-current-semester', action='store_true',
+                            help='Make the seeded semester current even if a non-seeded semester is current')
+
+    def handle(self, *args, **options):
+        preset = PRESETS[options['size']]
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        started = time.perf_counter()
+
+        if User.objects.filter(username__startswith=f'{SEED_PREFIX}-').exists():
+            if not options['replace']:
+                raise CommandError('A seeded dataset already exists; use --replace to rebuild it.')
+            self.step('Removing previous seeded dataset', self.remove_seeded)
+
+        real_current = Semester.objects.filter(is_current=True).exclude(name__startswith='Seed ')
+        if real_current.exists() and not options['take_current_semester']:
+            raise CommandError(
+                f'"{real_current.first().name}" is the current semester. Seeding makes its own semester current; '
+                'pass --take-current-semester to allow that.'
+            )
+
+        with transaction.atomic():
+            self.step('Schools, departments, semesters', self.seed_structure)
+            self.step('Courses and subjects', lambda: self.seed_courses(preset['courses']))
+            self.step('Instructors and course subjects', self.seed_course_subjects)
+            self.step('Assignments, materials, announcements', self.seed_content)
+            self.step('Students', lambda: self.seed_students(preset['students']))
+            self.step('Enrollments', self.seed_enrollments)
+            self.step('Submissions and subject progress', self.seed_submissions)
+            self.step('Notifications', self.seed_notifications)
+        if connection.vendor == 'postgresql':
+            # Fresh planner statistics, otherwise the first queries plan against empty tables
+            self.step('Analyzing tables', lambda: connection.cursor().execute('ANALYZE'))
+
+        self.stdout.write(self.style.SUCCESS(f'\n{"="*60}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {options["size"]} dataset (seed={options["seed"]}) in {time.perf_counter() - started:.1f}s'
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Log in as {SEED_PREFIX}-student-1 / {SEED_PREFIX}-instructor-1 / {SEED_PREFIX}-admin '
+            f'with password "{SEED_PREFIX}-password"'
+        ))
+        self.stdout.write(self.style.SUCCESS(f'{"="*60}'))
+
+    def step(self, label, func):
+        started = time.perf_counter()
+        result = func()
+        detail = f' ({result:,} rows)' if isinstance(result, int) else ''
+        self.stdout.write(f'  ✅ {label}{detail} - {time.perf_counter() - started:.1f}s')
+
+    def remove_seeded(self):
+        # Cascades take profiles, enrollments, submissions and notifications with them
+        User.objects.filter(username__startswith=f'{SEED_PREFIX}-').delete()
+        Subject.objects.filter(code__startswith=SEED_PREFIX.upper()).delete()
+        Course.objects.filter(slug__startswith=f'{SEED_PREFIX}-').delete()
+        Semester.objects.filter(name__startswith='Seed ').delete()
+        School.objects.filter(name__startswith='Seed ').delete()
+
+    def seed_structure(self):
+        User.objects.create_superuser(f'{SEED_PREFIX}-admin', 'admin@seed.example', f'{SEED_PREFIX}-password')
+        self.schools = School.objects.bulk_create([School(name=f'Seed School {i}') for i in range(1, 6)])
+        self.departments = Department.objects.bulk_create([
+            Department(school=school, name=f'Department {j}') for school in self.schools for j in range(1, 5)
+        ])
+        # Only the seeded current semester should be current (handle() checked this is allowed)
+        Semester.objects.filter(is_current=True).update(is_current=False)
+        today = self.now.date()
+        self.semesters = Semester.objects.bulk_create([
+            Semester(name=f'Seed Semester {i}', start_date=today - timedelta(days=120 * (2 - i) + 60),
+                     end_date=today - timedelta(days=120 * (2 - i) - 60), is_current=(i == 2))
+            for i in range(3)
+        ])
+        self.current_semester = self.semesters[-1]
+        forget_current_semester()  # the bulk writes above skip the invalidation signal
+        return 1 + len(self.schools) + len(self.departments) + len(self.semesters)
+
+    def seed_courses(self, count):
+        categories = ['diploma', 'short_certificate']
+        self.courses = Course.objects.bulk_create([
+            Course(title=f'Seed Course {i}', slug=f'{SEED_PREFIX}-course-{i}', category=categories[i % 2],
+                   duration='1 year', description=f'Synthetic course {i}')
+            for i in range(1, count + 1)
+        ])
+        self.subjects = Subject.objects.bulk_create([
+            Subject(title=f'Seed Subject {i}', code=f'{SEED_PREFIX.upper()}{i:05d}')
+            for i in range(1, count * SUBJECTS_PER_COURSE + 1)
+        ])
+        return len(self.courses) + len(self.subjects)
+
+    def seed_course_subjects(self):
+        password = make_password(f'{SEED_PREFIX}-password')
+        users = User.objects.bulk_create([
+            User(username=f'{SEED_PREFIX}-instructor-{i}', email=f'instructor{i}@seed.example', password=password)
+            for i in range(1, len(self.courses) * 2 + 1)
+        ], batch_size=5_000)
+        self.instructors = InstructorProfile.objects.bulk_create([
+            InstructorProfile(user=user, full_name=f'Seed Instructor {i}', email=user.email,
+                              department=self.rng.choice(self.departments))
+            for i, user in enumerate(users, start=1)
+        ], batch_size=5_000)
+
+        course_subjects = []
+        for index, course in enumerate(self.courses):
+            subjects = self.subjects[index * SUBJECTS_PER_COURSE:(index + 1) * SUBJECTS_PER_COURSE]
+            for semester in self.semesters[1:]:
+                for subject in subjects:
+                    course_subjects.append(CourseSubject(
+                        course=course, subject=subject, semester=semester,
+                        instructor=self.instructors[2 * index + self.rng.randrange(2)],
+                    ))
+        self.course_subjects = CourseSubject.objects.bulk_create(course_subjects, batch_size=5_000)
+        self.current_by_course = {}
+        for cs in self.course_subjects:
+            if cs.semester_id == self.current_semester.id:
+                self.current_by_course.setdefault(cs.course_id, []).append(cs)
+        return len(users) + len(self.course_subjects)
+
+    def seed_content(self):
+        assignments = []
+        for subject in self.subjects:
+            for n in range(1, ASSIGNMENTS_PER_SUBJECT + 1):
+                # Spread due dates from a month ago to three weeks ahead
+                due = self.now + timedelta(days=self.rng.randint(-30, 21), hours=self.rng.choice([0, 6, 11]))
+                assignments.append(Assignment(subject=subject, title=f'Assignment {n}',
+                                              description='Synthetic assignment', due_date=due))
+        self.assignments = Assignment.objects.bulk_create(assignments, batch_size=5_000)
+        self.assignments_by_subject = {}
+        for assignment in self.assignments:
+            self.assignments_by_subject.setdefault(assignment.subject_id, []).append(assignment)
+
+        types = ['outline', 'module', 'module', 'module', 'video', 'video']
+        materials = []
+        for subject in self.subjects:
+            for n, material_type in enumerate(types[:MATERIALS_PER_SUBJECT], start=1):
+                if material_type == 'video':
+                    video_id = ''.join(self.rng.choices('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-', k=11))
+                    material = LearningMaterial(subject=subject, title=f'Lecture {n}', type='video',
+                                                video_url=f'https://www.youtube.com/watch?v={video_id}')
+                    # copy_insert skips save(), which fills these in
+                    material.set_video_fields()
+                    materials.append(material)
+                else:
+                    materials.append(LearningMaterial(subject=subject, title=f'{material_type.title()} {n}',
+                                                      type=material_type,
+                                                      file=f'raw/upload/v1/{SEED_PREFIX}/{subject.code}-{n}.pdf'))
+        count = copy_insert(materials)
+
+        count += copy_insert(
+            Announcement(subject=subject, title=f'Announcement {n}', content='Synthetic announcement',
+                         created_at=self.now - timedelta(days=self.rng.randint(0, 60)))
+            for subject in self.subjects for n in range(1, ANNOUNCEMENTS_PER_SUBJECT + 1)
+        )
+        return len(self.assignments) + count
+
+    def seed_students(self, count):
+        password = make_password(f'{SEED_PREFIX}-password')
+        users = User.objects.bulk_create([
+            User(username=f'{SEED_PREFIX}-student-{i}', email=f'student{i}@seed.example', password=password)
+            for i in range(1, count + 1)
+        ], batch_size=5_000)
+        year = self.now.year
+        self.students = StudentProfile.objects.bulk_create([
+            StudentProfile(user=user, full_name=f'Seed Student {i}', email=user.email,
+                           student_number=f'SEED-{year}-{i:06d}', school=self.rng.choice(self.schools))
+            for i, user in enumerate(users, start=1)
+        ], batch_size=5_000)
+        return len(self.students) * 2
+
+    def seed_enrollments(self):
+        self.student_courses = {}
+        enrollments = []
+        for student in self.students:
+            # One course each, a tenth of students take a second one
+            courses = self.rng.sample(self.courses, 2 if self.rng.random() < 0.1 else 1)
+            self.student_courses[student.id] = [c.id for c in courses]
+            for course in courses:
+                enrollments.append(Enrollment(student=student, course=course,
+                                              created_at=self.now - timedelta(days=self.rng.randint(30, 120))))
+        return copy_insert(enrollments)
+
+    def seed_submissions(self):
+        # Both row kinds are streamed so the large presets never hold them all in memory
+        progress = []
+        progress_count = 0
+
+        def submissions():
+            nonlocal progress_count
+            for student in self.students:
+                yield from self._student_submissions(student, progress)
+                if len(progress) >= COPY_CHUNK:
+                    progress_count += copy_insert(progress)
+                    progress.clear()
+
+        count = copy_insert(submissions())
+        return count + progress_count + copy_insert(progress)
+
+    def _student_submissions(self, student, subject_enrollments):
+        """Yield one student's submissions; their subject progress rows go to ``subject_enrollments``"""
+        for course_id in self.student_courses[student.id]:
+            for cs in self.current_by_course.get(course_id, []):
+                assignments = self.assignments_by_subject[cs.subject_id]
+                submitted, scores = 0, []
+                for assignment in assignments:
+                    if self.rng.random() > 0.7:
+                        continue
+                    submitted += 1
+                    # Some students resubmit; only the last attempt is graded
+                    attempts = 2 if self.rng.random() < 0.3 else 1
+                    # copy_insert skips Submission.save(), so mark the last attempt latest here
+                    times = sorted(
+                        assignment.due_date - timedelta(hours=self.rng.randint(-24, 240))
+                        for _ in range(attempts)
+                    )
+                    for attempt, submitted_at in enumerate(times):
+                        latest = attempt == attempts - 1
+                        graded = latest and assignment.due_date < self.now and self.rng.random() < 0.8
+                        score = self.rng.randint(35, 100) if graded else None
+                        if score is not None:
+                            scores.append(score)
+                        yield Submission(
+                            assignment=assignment, student=student,
+                            file=f'raw/upload/v1/{SEED_PREFIX}/submission.pdf',
+                            submitted_at=submitted_at, is_latest=latest,
+                            score=score, grade=grade_for(score) if score is not None else '',
+                        )
+                avg = sum(scores) / len(scores) if scores else 0
+                subject_enrollments.append(SubjectEnrollment(
+                    student=student, course_subject=cs,
+                    progress=min(int(submitted / len(assignments) * 70 + avg * 0.3), 100),
+                ))
+
+    def seed_notifications(self):
+        types = [choice for choice, _ in Notification.NOTIFICATION_TYPES]
+
+        def generate():
+            for student in self.students:
+                for _ in range(NOTIFICATIONS_PER_STUDENT):
+                    notification_type = self.rng.choice(types)
+                    yield Notification(
+                        student=student, type=notification_type,
+                        title=f'Seed {notification_type} notification',
+                        message='Synthetic notification', link='/portal/',
+                        is_read=self.rng.random() < 0.6,
+                        created_at=self.now - timedelta(minutes=self.rng.randint(0, 60 * 24 * 60)),
+                    )
+        return copy_insert(generate())
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from student_portal.reminders import send_due_reminders
+
+
+class Command(BaseCommand):
+    help = 'Remind students of assignments due soon that they have not submitted (safe to run from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--windows',
+            help='Comma-separated hours before the due date to remind at (default DUE_REMINDER_WINDOWS_HOURS)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count the reminders that would be sent without creating them',
+        )
+
+    def handle(self, *args, **options):
+        if options['windows']:
+            windows = [int(hours) for hours in options['windows'].split(',')]
+        else:
+            windows = settings.DUE_REMINDER_WINDOWS_HOURS
+
+        created, emailed = send_due_reminders(windows=windows, dry_run=options['dry_run'])
+
+        verb = 'Would create' if options['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {created} reminders ({emailed} emails) for windows {", ".join(f"{w}h" for w in sorted(windows))}'
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from student_portal.notifications import queue_daily_digests
+
+
+class Command(BaseCommand):
+    help = 'Queue the daily email digest of unread notifications for students who enabled notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=24,
+            help='Include unread notifications from this many hours back',
+        )
+
+    def handle(self, *args, **options):
+        queued = queue_daily_digests(hours=options['hours'])
+        self.stdout.write(self.style.SUCCESS(f'Queued {queued} digest emails (deliver them with send_outbox)'))
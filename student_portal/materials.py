@@ -0,0 +1,37 @@
+"""
+Learning-material listings.
+
+list_materials() loads the materials of a set of subjects in one query,
+newest first, with their subject joined and only the columns the listings
+show. It groups them by type in Python. Each material gets ``link``: the
+YouTube page for videos, the file URL otherwise. The embed URL of a video
+is stored on the material (``embed_url``, empty unless it is a YouTube
+link).
+"""
+from .models import LearningMaterial
+
+
+MATERIAL_TYPES = ('outline', 'module', 'video')
+
+LISTING_FIELDS = (
+    'id', 'title', 'type', 'file', 'video_url', 'video_id', 'embed_url', 'created_at',
+    'subject__id', 'subject__code', 'subject__title',
+)
+
+
+def list_materials(subject_ids):
+    """
+    {type: [materials]} for the given subject ids (a list or a values_list
+    queryset, which becomes a subquery). Every type in MATERIAL_TYPES has a
+    key, in that order.
+    """
+    grouped = {material_type: [] for material_type in MATERIAL_TYPES}
+    materials = (
+        LearningMaterial.objects.filter(subject_id__in=subject_ids)
+        .select_related('subject').only(*LISTING_FIELDS).order_by('-created_at')
+    )
+    for material in materials:
+        is_video = material.type == 'video' and material.video_url
+        material.link = material.video_url if is_video else (material.file.url if material.file else None)
+        grouped.setdefault(material.type, []).append(material)
+    return grouped
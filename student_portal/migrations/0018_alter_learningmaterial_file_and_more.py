@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-19 11:05
+
+import core.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_portal', '0017_notification'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='learningmaterial',
+            name='file',
+            field=core.fields.MediaField(blank=True, max_length=255, null=True, verbose_name='file'),
+        ),
+        migrations.AlterField(
+            model_name='studentprofile',
+            name='profile_pic',
+            field=core.fields.MediaField(blank=True, max_length=255, null=True, verbose_name='profile_pic'),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='file',
+            field=core.fields.MediaField(max_length=255, verbose_name='file'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2 on 2026-10-19 11:10
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking writes on the live tables
+    atomic = False
+
+    dependencies = [
+        ('student_portal', '0018_alter_learningmaterial_file_and_more'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='announcement',
+            index=models.Index(fields=['subject', '-created_at'], name='announcement_subject_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='assignment',
+            index=models.Index(fields=['subject', '-due_date'], name='assignment_subject_due_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='coursesubject',
+            index=models.Index(fields=['semester', 'is_active', 'course'], name='cs_semester_active_course_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='coursesubject',
+            index=models.Index(fields=['instructor', 'semester'], name='cs_instructor_semester_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='learningmaterial',
+            index=models.Index(fields=['subject', 'type', '-created_at'], name='material_subject_type_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='notification',
+            index=models.Index(fields=['student', 'is_read', '-created_at'], name='notif_student_read_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['student', '-created_at'], name='notif_unread_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='submission',
+            index=models.Index(fields=['student', 'assignment'], name='submission_student_asg_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='submission',
+            index=models.Index(fields=['assignment', '-submitted_at'], name='submission_asg_submitted_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2 on 2026-10-19 12:07
+
+from django.db import migrations, models
+
+from student_portal.youtube import embed_url, parse_youtube_url
+
+
+def fill_video_fields(apps, schema_editor):
+    LearningMaterial = apps.get_model('student_portal', 'LearningMaterial')
+    materials = LearningMaterial.objects.exclude(video_url__isnull=True).exclude(video_url='').only('id', 'video_url')
+    batch = []
+    for material in materials.iterator(chunk_size=500):
+        parsed = parse_youtube_url(material.video_url)
+        if parsed:
+            material.video_id = parsed[0]
+            material.embed_url = embed_url(*parsed)
+            batch.append(material)
+        if len(batch) >= 500:
+            LearningMaterial.objects.bulk_update(batch, ['video_id', 'embed_url'])
+            batch = []
+    if batch:
+        LearningMaterial.objects.bulk_update(batch, ['video_id', 'embed_url'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_portal', '0019_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='learningmaterial',
+            name='embed_url',
+            field=models.URLField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='learningmaterial',
+            name='video_id',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(fill_video_fields, migrations.RunPython.noop),
+    ]
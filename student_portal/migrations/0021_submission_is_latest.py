@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-19 12:13
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def mark_latest_submissions(apps, schema_editor):
+    Submission = apps.get_model('student_portal', 'Submission')
+    newest = Submission.objects.filter(
+        student=OuterRef('student'), assignment=OuterRef('assignment')
+    ).order_by('-submitted_at', '-id').values('id')[:1]
+    Submission.objects.filter(id=Subquery(newest)).update(is_latest=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_portal', '0020_material_video_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='is_latest',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_latest_submissions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='submission',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_latest', True)), fields=('student', 'assignment'), name='submission_one_latest'),
+        ),
+    ]
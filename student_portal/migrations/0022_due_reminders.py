@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-19 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_portal', '0021_submission_is_latest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='key',
+            field=models.CharField(blank=True, editable=False, max_length=150, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='type',
+            field=models.CharField(choices=[('assignment', 'New Assignment'), ('material', 'New Material'), ('grade', 'Grade Posted'), ('announcement', 'Announcement'), ('reminder', 'Deadline Reminder')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2 on 2026-10-19 12:17
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the index without locking writes on the live notifications table
+    atomic = False
+
+    dependencies = [
+        ('student_portal', '0023_notification_digests'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['subject', 'type', '-created_at'], name='notif_digest_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2 on 2026-10-19 12:16
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the index without locking writes on the live assignments table
+    atomic = False
+
+    dependencies = [
+        ('student_portal', '0024_notification_digest_index'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='assignment',
+            index=models.Index(fields=['due_date'], name='assignment_due_idx'),
+        ),
+    ]
@@ -1,8 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MaxValueValidator, MinValueValidator
-from cloudinary.models import CloudinaryField
+from core.fields import MediaField
 from core.models import Course, School
+from .youtube import parse_youtube_url, embed_url as youtube_embed_url
 import datetime
 
 
@@ -11,7 +12,7 @@ class StudentProfile(models.Model):
     full_name = models.CharField(max_length=200, default='Student Name')
     email = models.EmailField(default='student@example.com')
     phone = models.CharField(max_length=20, default='0000000000')
-    profile_pic = CloudinaryField('profile_pic', blank=True, null=True)
+    profile_pic = MediaField('profile_pic', blank=True, null=True)
     student_number = models.CharField(max_length=50, blank=True, unique=True)
     school = models.ForeignKey(School, on_delete=models.SET_NULL, null=True, blank=True, related_name='students')
 
@@ -90,6 +91,10 @@ class CourseSubject(models.Model):
     
     class Meta:
         unique_together = ('course', 'subject', 'semester')  # Prevent duplicate entries
+        indexes = [
+            models.Index(fields=['semester', 'is_active', 'course'], name='cs_semester_active_course_idx'),
+            models.Index(fields=['instructor', 'semester'], name='cs_instructor_semester_idx'),
+        ]
 
     def __str__(self):
         return f"{self.course.title} - {self.subject.title} ({self.semester.name})"
@@ -107,6 +112,11 @@ class Assignment(models.Model):
     
     class Meta:
         ordering = ['-due_date']
+        indexes = [
+            models.Index(fields=['subject', '-due_date'], name='assignment_subject_due_idx'),
+            # Deadline reminders scan upcoming due dates across all subjects
+            models.Index(fields=['due_date'], name='assignment_due_idx'),
+        ]
     
     def __str__(self):
         subject_name = self.subject.title if self.subject else "No Subject"
@@ -116,66 +126,100 @@ class Assignment(models.Model):
 class Submission(models.Model):
     assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE)
     student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE)
-    file = CloudinaryField('file', resource_type='raw')  # Word/PDF upload
+    file = MediaField('file', resource_type='raw')  # Word/PDF upload
     submitted_at = models.DateTimeField(auto_now_add=True)
     grade = models.CharField(max_length=2, blank=True)
     score = models.PositiveIntegerField(null=True, blank=True, validators=[MaxValueValidator(100)], help_text="Score out of 100")
+    # Set on the newest submission of each (student, assignment); resubmitting moves it
+    is_latest = models.BooleanField(default=False, editable=False)
     
     class Meta:
         ordering = ['-submitted_at']
+        indexes = [
+            models.Index(fields=['student', 'assignment'], name='submission_student_asg_idx'),
+            models.Index(fields=['assignment', '-submitted_at'], name='submission_asg_submitted_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'assignment'], condition=models.Q(is_latest=True),
+                name='submission_one_latest',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.student.full_name} - {self.assignment.title}"
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            # is_latest only changes on insert and delete; a copy loaded before a resubmission must not write it back
+            if kwargs.get('update_fields') is None:
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name != 'is_latest'
+                ]
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            # Serialise submissions of one student so two inserts cannot both become latest
+            StudentProfile.objects.select_for_update().filter(pk=self.student_id).exists()
+            Submission.objects.filter(
+                student_id=self.student_id, assignment_id=self.assignment_id, is_latest=True
+            ).update(is_latest=False)
+            self.is_latest = True
+            super().save(*args, **kwargs)
+
 
 class LearningMaterial(models.Model):
     """Learning materials are uploaded per subject"""
     subject = models.ForeignKey('Subject', on_delete=models.CASCADE, related_name='learning_materials', null=True, blank=True)
     title = models.CharField(max_length=200, default='Untitled Material')
     # File is optional to allow video-only materials
-    file = CloudinaryField('file', resource_type='raw', blank=True, null=True)
+    file = MediaField('file', resource_type='raw', blank=True, null=True)
     video_url = models.URLField(blank=True, null=True, help_text="Paste a YouTube link for videos")
     type = models.CharField(max_length=20, choices=(('outline', 'Subject Outline'), ('module', 'Module'), ('video', 'Video')), default='module')
+    # Parsed from video_url on save; empty when it is not a YouTube video link
+    video_id = models.CharField(max_length=20, blank=True, default='', editable=False)
+    embed_url = models.URLField(blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['subject', 'type', '-created_at'], name='material_subject_type_idx'),
+        ]
     
     def __str__(self):
         subject_name = self.subject.title if self.subject else "No Subject"
         return f"{subject_name} - {self.title}"
 
+    def set_video_fields(self):
+        """Store the parsed YouTube id and embed URL of video_url (empty if not YouTube)."""
+        parsed = parse_youtube_url(self.video_url)
+        if parsed:
+            self.video_id = parsed[0]
+            self.embed_url = youtube_embed_url(*parsed)
+        else:
+            self.video_id = ''
+            self.embed_url = ''
+
+    def save(self, *args, **kwargs):
+        self.set_video_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'video_url' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'video_id', 'embed_url'}
+        super().save(*args, **kwargs)
+
     def is_valid_youtube(self):
-        if not self.video_url:
-            return False
-        url = self.video_url.lower()
-        # Accept only YouTube watch or youtu.be links
-        return (
-            url.startswith('https://www.youtube.com/watch') or
-            url.startswith('http://www.youtube.com/watch') or
-            url.startswith('https://youtube.com/watch') or
-            url.startswith('http://youtube.com/watch') or
-            url.startswith('https://youtu.be/') or
-            url.startswith('http://youtu.be/')
-        )
+        return bool(self.video_id)
 
     def get_display_url(self):
-        if self.type == 'video' and self.video_url and self.is_valid_youtube():
-            return self.get_embed_url()
+        if self.type == 'video' and self.embed_url:
+            return self.embed_url
         elif self.file:
             return self.file.url
         return None
 
     def get_embed_url(self):
-        if not self.video_url:
-            return None
-        url = self.video_url
-        if 'watch?v=' in url:
-            return url.replace('watch?v=', 'embed/')
-        if 'youtu.be/' in url:
-            return url.replace('youtu.be/', 'www.youtube.com/embed/')
-        # Fallback None for non-YouTube
-        return None
+        return self.embed_url or None
 
 
 class NotificationPreference(models.Model):
@@ -195,6 +239,9 @@ class Announcement(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['subject', '-created_at'], name='announcement_subject_idx'),
+        ]
     
     def __str__(self):
         subject_name = self.subject.title if self.subject else "No Subject"
@@ -207,18 +254,31 @@ class Notification(models.Model):
         ('material', 'New Material'),
         ('grade', 'Grade Posted'),
         ('announcement', 'Announcement'),
+        ('reminder', 'Deadline Reminder'),
     )
     
     student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='notifications')
     type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES)
+    # Subject-wide notifications of one type are merged into a digest row; count is how many it covers
+    subject = models.ForeignKey('Subject', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    count = models.PositiveIntegerField(default=1)
     title = models.CharField(max_length=200)
     message = models.TextField()
     link = models.CharField(max_length=500, blank=True, null=True)
     is_read = models.BooleanField(default=False)
+    # Idempotency key for generated notifications (e.g. deadline reminders); reruns skip existing keys
+    key = models.CharField(max_length=150, unique=True, null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['student', 'is_read', '-created_at'], name='notif_student_read_idx'),
+            # Unread badge and mark-all-read only ever touch unread rows
+            models.Index(fields=['student', '-created_at'], condition=models.Q(is_read=False), name='notif_unread_idx'),
+            # Finding the unread digest rows a new subject notification merges into
+            models.Index(fields=['subject', 'type', '-created_at'], condition=models.Q(is_read=False), name='notif_digest_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.full_name} - {self.title}"
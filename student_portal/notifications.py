@@ -0,0 +1,129 @@
+"""
+Notification fan-out for student portal events
+
+Material and assignment notifications are coalesced: when a student still
+has an unread notification of the same type for the same subject from the
+last NOTIFICATION_COALESCE_MINUTES, it becomes a digest ("5 new materials
+in Accounting 101") updated in place instead of a new row. The digest
+keeps the message of every notification merged into it. Students with notifications enabled can also get a daily email
+digest of their unread notifications (send_notification_digest command).
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Cast, Concat, Left
+from django.utils import timezone
+
+from core.metrics import NOTIFICATION_FANOUT
+from core.models import OutboundEmail
+from core.outbox import queue_emails
+from .models import CourseSubject, Notification, StudentProfile
+
+
+# Types merged into digests, with the noun used in the digest title.
+# Announcements are not merged: each one is read on its own.
+DIGEST_NOUNS = {
+    'material': 'materials',
+    'assignment': 'assignments',
+}
+
+
+def subject_student_ids(subject):
+    """IDs of students enrolled in a course that offers this subject in the current semester"""
+    course_ids = CourseSubject.objects.filter(
+        subject=subject,
+        semester__is_current=True
+    ).values_list('course_id', flat=True)
+
+    return StudentProfile.objects.filter(
+        enrollment__course_id__in=course_ids
+    ).distinct().values_list('id', flat=True)
+
+
+def coalesce_into_digests(subject, type, student_ids, message, link, count):
+    """
+    Add ``count`` to the recent unread notifications of this type and
+    subject of the given students. Returns the ids of the students whose
+    notification was merged.
+    """
+    cutoff = timezone.now() - timedelta(minutes=settings.NOTIFICATION_COALESCE_MINUTES)
+    digests = Notification.objects.filter(
+        student_id__in=student_ids, subject=subject, type=type, is_read=False, created_at__gte=cutoff,
+    )
+    merged = set(digests.values_list('student_id', flat=True))
+    if merged:
+        title = Concat(Cast(F('count') + count, CharField()), Value(f' new {DIGEST_NOUNS[type]} in {subject.title}'))
+        digests.update(
+            count=F('count') + count,
+            # A long subject title is cut off rather than overflowing the column
+            title=Left(title, Notification._meta.get_field('title').max_length),
+            message=Concat(F('message'), Value(f'\n{message}')),
+            link=link,
+            created_at=timezone.now(),
+        )
+    return merged
+
+
+def notify_subject_students(subject, type, title, message, link=None, count=1):
+    """
+    Send one notification to every student taking the subject this semester.
+    Rows are written with a single bulk insert instead of one INSERT per student;
+    students with a recent unread notification of a coalesced type get it
+    updated into a digest instead. ``count`` is how many items the
+    notification announces (e.g. the files of a batch upload).
+
+    Returns:
+        Number of students notified
+    """
+    student_ids = list(subject_student_ids(subject))
+    merged = set()
+    if type in DIGEST_NOUNS and settings.NOTIFICATION_COALESCE_MINUTES:
+        merged = coalesce_into_digests(subject, type, student_ids, message, link, count)
+    title = title[:Notification._meta.get_field('title').max_length]
+    notifications = [
+        Notification(student_id=student_id, type=type, title=title, message=message, link=link,
+                     subject=subject, count=count)
+        for student_id in student_ids if student_id not in merged
+    ]
+    Notification.objects.bulk_create(notifications, batch_size=500)
+    NOTIFICATION_FANOUT.observe(len(student_ids), type=type)
+    return len(student_ids)
+
+
+def queue_daily_digests(now=None, hours=24):
+    """
+    Queue one email per student with notifications enabled, listing their
+    unread notifications from the last ``hours``. The outbox key includes
+    the date, so a second run on the same day queues nothing.
+
+    Returns:
+        Number of emails queued
+    """
+    now = now or timezone.now()
+    rows = Notification.objects.filter(
+        student__notificationpreference__enabled=True,
+        is_read=False,
+        created_at__gte=now - timedelta(hours=hours),
+    ).exclude(student__email='').order_by('student_id', '-created_at').values(
+        'student_id', 'student__email', 'student__full_name', 'title', 'link',
+    )
+    by_student = defaultdict(list)
+    for row in rows:
+        by_student[row['student_id']].append(row)
+
+    day = timezone.localdate(now).isoformat()
+    emails = []
+    for student_id, items in by_student.items():
+        lines = '\n'.join(
+            f"- {item['title']}" + (f" (https://{settings.SITE_URL}{item['link']})" if item['link'] else '')
+            for item in items
+        )
+        emails.append(OutboundEmail(
+            key=f'digest:{day}:{student_id}',
+            to=items[0]['student__email'],
+            subject=f'Your SIAT updates: {len(items)} unread notification{"s" if len(items) != 1 else ""}',
+            body=f"Dear {items[0]['student__full_name']},\n\nHere is what is new in the student portal:\n\n{lines}\n",
+        ))
+    return queue_emails(emails)
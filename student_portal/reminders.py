@@ -0,0 +1,104 @@
+"""
+Deadline reminders.
+
+send_due_reminders() finds assignments due within the largest of
+DUE_REMINDER_WINDOWS_HOURS and, in one query, every student taking the
+subject this semester who has not submitted. Each of them gets a
+'reminder' notification, and students who turned notifications on also
+get an email through the outbox (core.outbox).
+
+An assignment is reminded about once per window: the smallest window its
+due date falls in. Notification and email keys are
+``reminder:<assignment>:<window>h:<student>``, so running the command
+again (cron overlap, a retry) does not remind anyone twice.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef
+from django.urls import reverse
+from django.utils import timezone
+
+from core.metrics import NOTIFICATION_FANOUT
+from core.models import OutboundEmail
+from core.outbox import queue_emails
+from .models import Assignment, Enrollment, Notification, Submission
+
+
+def due_assignments(now, windows):
+    """{assignment: window} for assignments due in the next max(windows) hours."""
+    windows = sorted(windows)
+    assignments = Assignment.objects.filter(
+        due_date__gt=now, due_date__lte=now + timedelta(hours=windows[-1])
+    ).select_related('subject')
+    due = {}
+    for assignment in assignments:
+        hours_left = (assignment.due_date - now).total_seconds() / 3600
+        due[assignment] = next(window for window in windows if hours_left <= window)
+    return due
+
+
+def missing_submissions(assignment_ids):
+    """
+    One row per (assignment, student) where the student takes the
+    assignment's subject this semester and has not submitted it.
+    """
+    return (
+        Enrollment.objects.filter(
+            course__coursesubject__semester__is_current=True,
+            course__coursesubject__is_active=True,
+            course__coursesubject__subject__assignments__in=assignment_ids,
+        )
+        .annotate(assignment_id=F('course__coursesubject__subject__assignments__id'))
+        .exclude(Exists(Submission.objects.filter(student=OuterRef('student'), assignment=OuterRef('assignment_id'))))
+        .order_by()
+        .values('assignment_id', 'student_id', 'student__email', 'student__full_name',
+                'student__notificationpreference__enabled')
+        .distinct()
+    )
+
+
+def reminder_key(assignment, window, student_id):
+    return f'reminder:{assignment.id}:{window}h:{student_id}'
+
+
+def send_due_reminders(now=None, windows=None, dry_run=False):
+    """
+    Create the reminders that are due.
+
+    Returns:
+        (notifications created, emails queued)
+    """
+    now = now or timezone.now()
+    due = due_assignments(now, windows or settings.DUE_REMINDER_WINDOWS_HOURS)
+    if not due:
+        return 0, 0
+    by_id = {assignment.id: assignment for assignment in due}
+
+    notifications, emails = [], []
+    for row in missing_submissions(list(by_id)):
+        assignment = by_id[row['assignment_id']]
+        key = reminder_key(assignment, due[assignment], row['student_id'])
+        due_at = timezone.localtime(assignment.due_date).strftime('%b %d, %H:%M')
+        title = f'Due soon: {assignment.title}'
+        message = f'{assignment.title} ({assignment.subject.title}) is due {due_at} and you have not submitted it yet.'
+        link = reverse('student_portal:assignment_detail', args=[assignment.id])
+        notifications.append(Notification(
+            student_id=row['student_id'], type='reminder', title=title, message=message, link=link, key=key,
+        ))
+        if row['student__notificationpreference__enabled'] and row['student__email']:
+            emails.append(OutboundEmail(
+                key=key, to=row['student__email'], subject=title,
+                body=f"Dear {row['student__full_name']},\n\n{message}\nSubmit it at https://{settings.SITE_URL}{link}",
+            ))
+
+    # Skip keys from earlier runs so the counts only cover new reminders
+    existing = set(Notification.objects.filter(key__in=[n.key for n in notifications]).values_list('key', flat=True))
+    notifications = [n for n in notifications if n.key not in existing]
+    emails = [email for email in emails if email.key not in existing]
+    if dry_run:
+        return len(notifications), len(emails)
+
+    Notification.objects.bulk_create(notifications, batch_size=500, ignore_conflicts=True)
+    NOTIFICATION_FANOUT.observe(len(notifications), type='reminder')
+    return len(notifications), queue_emails(emails)
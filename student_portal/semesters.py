@@ -0,0 +1,24 @@
+"""
+Current-semester lookup.
+
+Nearly every portal page and progress update starts from the current
+semester, which changes a few times a year. It is cached for
+CURRENT_SEMESTER_CACHE_SECONDS and dropped whenever a Semester is saved or
+deleted (see signals.py). Bulk updates bypass those signals, so call
+forget_current_semester() after them.
+"""
+from django.conf import settings
+
+from core.cache import CacheNamespace
+from .models import Semester
+
+
+SEMESTER_CACHE = CacheNamespace('semester', timeout=settings.CURRENT_SEMESTER_CACHE_SECONDS)
+
+
+def get_current_semester():
+    return SEMESTER_CACHE.get_or_set('current', lambda: Semester.objects.filter(is_current=True).first())
+
+
+def forget_current_semester():
+    SEMESTER_CACHE.invalidate()
@@ -1,6 +1,10 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Submission, SubjectEnrollment, Assignment, LearningMaterial, CourseSubject, Semester
+from core.cache import CacheNamespace
+from .models import (
+    Submission, SubjectEnrollment, Assignment, LearningMaterial, CourseSubject, Semester, Subject, Enrollment,
+)
+from .semesters import get_current_semester, forget_current_semester
 
 
 def calculate_subject_progress(student, subject):
@@ -10,7 +14,7 @@ def calculate_subject_progress(student, subject):
     - 70% Assignment completion (submitted vs total)
     - 30% Average assignment score
     """
-    current_semester = Semester.objects.filter(is_current=True).first()
+    current_semester = get_current_semester()
     if not current_semester:
         return 0
     
@@ -21,10 +25,11 @@ def calculate_subject_progress(student, subject):
         # If no assignments, progress is 100% (subject has no requirements)
         return 100
     
-    # Get submitted assignments
+    # Get submitted assignments, counting resubmissions once
     submitted_assignments = Submission.objects.filter(
         student=student,
-        assignment__subject=subject
+        assignment__subject=subject,
+        is_latest=True
     ).count()
     
     # Calculate completion percentage (70% weight)
@@ -35,6 +40,7 @@ def calculate_subject_progress(student, subject):
     avg_score = Submission.objects.filter(
         student=student,
         assignment__subject=subject,
+        is_latest=True,
         score__isnull=False
     ).aggregate(avg=Avg('score'))['avg']
     
@@ -50,7 +56,7 @@ def update_all_subject_enrollments(student):
     """
     Update progress for all of a student's subject enrollments
     """
-    current_semester = Semester.objects.filter(is_current=True).first()
+    current_semester = get_current_semester()
     if not current_semester:
         return
     
@@ -86,7 +92,7 @@ def update_progress_on_submission(sender, instance, created, **kwargs):
         # New submission - update progress for this subject
         student = instance.student
         subject = instance.assignment.subject
-        current_semester = Semester.objects.filter(is_current=True).first()
+        current_semester = get_current_semester()
         
         if not current_semester:
             return
@@ -119,7 +125,7 @@ def update_progress_on_submission(sender, instance, created, **kwargs):
     elif instance.score is not None:
         student = instance.student
         subject = instance.assignment.subject
-        current_semester = Semester.objects.filter(is_current=True).first()
+        current_semester = get_current_semester()
         
         if not current_semester:
             return
@@ -145,3 +151,37 @@ def update_progress_on_submission(sender, instance, created, **kwargs):
                 subject_enrollment.save()
                 
                 print(f"✅ Updated progress for {student.full_name} in {subject.title}: {new_progress}% (score updated)")
+
+
+@receiver(post_delete, sender=Submission)
+def promote_latest_submission(sender, instance, **kwargs):
+    """Deleting the latest submission makes the newest remaining one latest"""
+    if not instance.is_latest:
+        return
+    newest = Submission.objects.filter(
+        student_id=instance.student_id, assignment_id=instance.assignment_id
+    ).order_by('-submitted_at', '-id').values('id')[:1]
+    Submission.objects.filter(id__in=newest).update(is_latest=True)
+
+
+@receiver(post_save, sender=Semester)
+@receiver(post_delete, sender=Semester)
+def invalidate_current_semester(sender, **kwargs):
+    """Any semester change may change which one is current"""
+    forget_current_semester()
+
+
+# Data version of the cached subject-list template fragments (depends="subject-lists")
+SUBJECT_LISTS = CacheNamespace('subject-lists')
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+@receiver(post_save, sender=CourseSubject)
+@receiver(post_delete, sender=CourseSubject)
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+@receiver(post_save, sender=Semester)
+@receiver(post_delete, sender=Semester)
+def invalidate_subject_lists(sender, **kwargs):
+    SUBJECT_LISTS.invalidate()
@@ -1,3 +1,249 @@
+import json
+from datetime import timedelta
+from importlib import import_module
+from unittest import skipUnless
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Course, Department, School
+from instructor_portal.models import InstructorProfile
+from .models import (
+    Announcement, Assignment, CourseSubject, Enrollment, LearningMaterial, Notification, Semester,
+    StudentProfile, Subject, Submission,
+)
+from .notifications import notify_subject_students
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN plans are only checked on PostgreSQL')
+class HotQueryIndexTests(TestCase):
+    """The portal's hot queries are served by the indexes added in migration 0019"""
+
+    @classmethod
+    def setUpTestData(cls):
+        school = School.objects.create(name='Test School')
+        department = Department.objects.create(school=school, name='Test Department')
+        course = Course.objects.create(title='Test Course')
+        cls.semester = Semester.objects.create(name='Test Semester', is_current=True)
+        subject = Subject.objects.create(title='Test Subject', code='TEST001')
+        cls.instructor = InstructorProfile.objects.create(
+            user=User.objects.create(username='instructor'), department=department,
+        )
+        CourseSubject.objects.create(course=course, subject=subject, semester=cls.semester, instructor=cls.instructor)
+        cls.student = StudentProfile.objects.create(user=User.objects.create(username='student'), school=school)
+        Enrollment.objects.create(student=cls.student, course=course)
+        cls.assignment = Assignment.objects.create(subject=subject, due_date=timezone.now() + timedelta(days=1))
+        Submission.objects.create(assignment=cls.assignment, student=cls.student, file='submission.pdf')
+        LearningMaterial.objects.create(subject=subject, type='module')
+        Announcement.objects.create(subject=subject)
+        Notification.objects.create(student=cls.student, type='grade', title='Graded', message='Graded')
+        cls.subject = subject
+        cls.course = course
+
+    def setUp(self):
+        # The test tables are tiny; without this the planner always prefers a sequential scan
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def index_names(self, queryset):
+        """Names of the indexes the plan of ``queryset`` scans its own table with"""
+        table = queryset.model._meta.db_table
+        nodes = [json.loads(queryset.explain(format='json'))[0]['Plan']]
+        names = set()
+        while nodes:
+            node = nodes.pop()
+            nodes.extend(node.get('Plans', []))
+            if node.get('Relation Name') == table and 'Index Name' in node:
+                names.add(node['Index Name'])
+        return names
+
+    def assertUsesIndex(self, queryset, *index_names):
+        used = self.index_names(queryset)
+        self.assertTrue(used & set(index_names), f'{queryset.model.__name__} query uses {used or "no index"}')
+
+    def test_student_notifications(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(student=self.student)[:10],
+            'notif_student_read_idx', 'notif_unread_idx',
+        )
+
+    def test_unread_notification_count(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(student=self.student, is_read=False).values('pk'),
+            'notif_student_read_idx', 'notif_unread_idx',
+        )
+
+    def test_student_submissions_for_assignment(self):
+        self.assertUsesIndex(
+            Submission.objects.filter(student=self.student, assignment=self.assignment),
+            'submission_student_asg_idx', 'submission_asg_submitted_idx',
+        )
+
+    def test_latest_submissions_for_assignment(self):
+        self.assertUsesIndex(
+            Submission.objects.filter(assignment=self.assignment).order_by('-submitted_at')[:3],
+            'submission_asg_submitted_idx',
+        )
+
+    def test_student_current_semester_subjects(self):
+        self.assertUsesIndex(
+            CourseSubject.objects.filter(course_id__in=[self.course.id], semester=self.semester, is_active=True),
+            'cs_semester_active_course_idx',
+        )
+
+    def test_instructor_current_semester_subjects(self):
+        self.assertUsesIndex(
+            CourseSubject.objects.filter(instructor=self.instructor, semester=self.semester),
+            'cs_instructor_semester_idx',
+        )
+
+    def test_subject_assignments_by_due_date(self):
+        self.assertUsesIndex(
+            Assignment.objects.filter(subject_id__in=[self.subject.id]).order_by('-due_date'),
+            'assignment_subject_due_idx',
+        )
+
+    def test_subject_materials_of_one_type(self):
+        self.assertUsesIndex(
+            LearningMaterial.objects.filter(subject=self.subject, type='module').order_by('-created_at'),
+            'material_subject_type_idx',
+        )
+
+    def test_dashboard_announcements(self):
+        self.assertUsesIndex(
+            Announcement.objects.filter(subject_id__in=[self.subject.id]).order_by('-created_at')[:5],
+            'announcement_subject_idx',
+        )
+
+
+class LatestSubmissionTests(TestCase):
+    """Submission.is_latest marks exactly the newest submission of a student for an assignment"""
+
+    @classmethod
+    def setUpTestData(cls):
+        subject = Subject.objects.create(title='Test Subject', code='TEST001')
+        cls.assignment = Assignment.objects.create(subject=subject)
+        cls.student = StudentProfile.objects.create(user=User.objects.create(username='student'))
+
+    def submit(self):
+        return Submission.objects.create(assignment=self.assignment, student=self.student, file='submission.pdf')
+
+    def latest(self):
+        return list(Submission.objects.filter(is_latest=True).values_list('pk', flat=True))
+
+    def test_first_submission_is_latest(self):
+        first = self.submit()
+        self.assertEqual(self.latest(), [first.pk])
+
+    def test_resubmitting_moves_latest(self):
+        self.submit()
+        second = self.submit()
+        self.assertEqual(self.latest(), [second.pk])
+
+    def test_grading_a_copy_loaded_before_resubmitting(self):
+        first = self.submit()
+        second = self.submit()
+        first.score = 80
+        first.save()
+        self.assertEqual(self.latest(), [second.pk])
+
+    def test_deleting_latest_promotes_previous(self):
+        first = self.submit()
+        self.submit().delete()
+        self.assertEqual(self.latest(), [first.pk])
+
+    def test_deleting_older_keeps_latest(self):
+        first = self.submit()
+        second = self.submit()
+        first.delete()
+        self.assertEqual(self.latest(), [second.pk])
+
+    def test_backfill_marks_newest_of_duplicates(self):
+        other = Assignment.objects.create(subject=self.assignment.subject)
+        # bulk_create skips Submission.save(), like rows written before migration 0021
+        rows = Submission.objects.bulk_create([
+            Submission(assignment=assignment, student=self.student, file='submission.pdf')
+            for assignment in [self.assignment, self.assignment, other, other]
+        ])
+        now = timezone.now()
+        Submission.objects.filter(pk=rows[0].pk).update(submitted_at=now - timedelta(days=1))
+        Submission.objects.filter(pk=rows[1].pk).update(submitted_at=now)
+        Submission.objects.filter(pk__in=[rows[2].pk, rows[3].pk]).update(submitted_at=now)
+
+        migration = import_module('student_portal.migrations.0021_submission_is_latest')
+        migration.mark_latest_submissions(apps, None)
+
+        # The newest submission wins, and the higher id breaks ties
+        self.assertCountEqual(self.latest(), [rows[1].pk, rows[3].pk])
+
+
+class NotificationDigestTests(TestCase):
+    """Recent unread material and assignment notifications of a subject are merged into one"""
+
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(title='Test Course')
+        semester = Semester.objects.create(name='Test Semester', is_current=True)
+        cls.subject = Subject.objects.create(title='S' * 200, code='TEST001')
+        CourseSubject.objects.create(course=course, subject=cls.subject, semester=semester)
+        cls.student = StudentProfile.objects.create(user=User.objects.create(username='student'))
+        Enrollment.objects.create(student=cls.student, course=course)
+
+    def notify(self, type, message):
+        notify_subject_students(self.subject, type=type, title=f'New: {message}', message=message)
+
+    def test_digest_keeps_every_message_and_fits_the_title(self):
+        self.notify('material', 'First upload')
+        self.notify('material', 'Second upload')
+        digest = Notification.objects.get(student=self.student)
+        self.assertEqual(digest.count, 2)
+        self.assertEqual(digest.title, f'2 new materials in {self.subject.title}'[:200])
+        self.assertEqual(digest.message, 'First upload\nSecond upload')
+
+    def test_announcements_are_not_merged(self):
+        self.notify('announcement', 'Exam moved')
+        self.notify('announcement', 'Room changed')
+        self.assertEqual(Notification.objects.filter(student=self.student).count(), 2)
+
+
+class MaterialsViewTests(TestCase):
+    """Students only see the materials of the subjects they take"""
+
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(title='Test Course')
+        semester = Semester.objects.create(name='Test Semester', is_current=True)
+        cls.own = Subject.objects.create(title='Own Subject', code='TEST001')
+        cls.other = Subject.objects.create(title='Other Subject', code='TEST002')
+        CourseSubject.objects.create(course=course, subject=cls.own, semester=semester)
+        cls.user = User.objects.create(username='student')
+        student = StudentProfile.objects.create(user=cls.user)
+        Enrollment.objects.create(student=student, course=course)
+        LearningMaterial.objects.create(subject=cls.own, title='Own Module', type='module')
+        LearningMaterial.objects.create(subject=cls.other, title='Other Module', type='module')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['portal'] = 'student'
+        session.save()
+        # The test client logs in under SESSION_COOKIE_NAME; the portal reads its own cookie
+        self.client.cookies[settings.STUDENT_SESSION_COOKIE_NAME] = session.session_key
+
+    def get(self, subject_id):
+        response = self.client.get('/portal/materials/', {'subject_id': subject_id})
+        titles = [material.title for material in response.context['materials_by_type']['module']]
+        return response.context['selected_subject_id'], titles
+
+    def test_own_subject_is_selected(self):
+        self.assertEqual(self.get(self.own.id), (self.own.id, ['Own Module']))
+
+    def test_other_subject_falls_back_to_own_materials(self):
+        self.assertEqual(self.get(self.other.id), (None, ['Own Module']))
 
-# Create your tests here.
+    def test_invalid_subject_id_is_ignored(self):
+        self.assertEqual(self.get('abc'), (None, ['Own Module']))
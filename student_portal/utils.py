@@ -3,6 +3,7 @@ Utility functions for student portal
 """
 from .models import SubjectEnrollment, CourseSubject, Semester, Enrollment
 from .signals import calculate_subject_progress
+from .semesters import get_current_semester
 
 
 def update_student_progress(student, subject):
@@ -16,7 +17,7 @@ def update_student_progress(student, subject):
     Returns:
         Updated progress value (0-100)
     """
-    current_semester = Semester.objects.filter(is_current=True).first()
+    current_semester = get_current_semester()
     if not current_semester:
         return 0
     
@@ -57,7 +58,7 @@ def bulk_update_all_students_progress():
     """
     from .models import StudentProfile
     
-    current_semester = Semester.objects.filter(is_current=True).first()
+    current_semester = get_current_semester()
     if not current_semester:
         return {'error': 'No current semester found'}
     
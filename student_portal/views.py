@@ -3,13 +3,17 @@ from django.http import Http404, JsonResponse
 from django.views.generic import DetailView
 from .models import Enrollment, Assignment, Submission, CourseSubject, LearningMaterial, Semester, StudentProfile, NotificationPreference, Announcement, Notification
 from .forms import SubmissionForm, ProfileForm
+from .semesters import get_current_semester
+from .materials import list_materials
+from .assignment_status import with_status, status_counts
 from core.models import Course
+from core.storage import get_media_storage
+from core.uploads import upload_errors, add_upload_errors
 from django.db import models
 from django.contrib import messages
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
 import logging
-from cloudinary.utils import cloudinary_url
 
 
 logger = logging.getLogger(__name__)
@@ -20,9 +24,9 @@ def dashboard(request):
         logout(request)
         return redirect("student_portal:student_login")
     
-    profile = get_object_or_404(StudentProfile, user=request.user)
+    profile = request.student
     enrollments = Enrollment.objects.filter(student=profile)
-    current_semester = Semester.objects.filter(is_current=True).first()
+    current_semester = get_current_semester()
     
     # Get subjects for the student's current semester and enrolled courses
     if current_semester:
@@ -45,6 +49,9 @@ def dashboard(request):
             semester=current_semester,
             is_active=True
         ).select_related('subject', 'course').values('subject_id', 'subject__title').distinct()
+        statuses = status_counts(
+            Assignment.objects.filter(subject_id__in=subjects_qs.values('subject_id')), profile
+        )
         for s in subjects_qs:
             subject_id = s['subject_id']
             subject_title = s['subject__title']
@@ -63,11 +70,12 @@ def dashboard(request):
             
             subj_avg_score = Submission.objects.filter(
                 assignment__subject_id=subject_id,
-                student=profile
+                student=profile,
+                is_latest=True
             ).aggregate(avg=models.Avg('score'))['avg'] or 0
             
             subj_progress = subject_enrollment.progress if subject_enrollment else 0
-            subj_assignments = Assignment.objects.filter(subject_id=subject_id).count()
+            subj_statuses = statuses.get(subject_id, {})
             subj_materials = LearningMaterial.objects.filter(subject_id=subject_id).count()
 
             subject_cards.append({
@@ -75,7 +83,9 @@ def dashboard(request):
                 'title': subject_title,
                 'avg_score': round(subj_avg_score, 2) if subj_avg_score else 0,
                 'avg_progress': round(subj_progress, 2) if subj_progress else 0,
-                'assignments_count': subj_assignments,
+                'assignments_count': sum(subj_statuses.values()),
+                'assignments_done': sum(subj_statuses.get(status, 0) for status in ('graded', 'late', 'submitted')),
+                'assignments_missing': subj_statuses.get('missing', 0),
                 'materials_count': subj_materials,
             })
             course_labels.append(subject_title)
@@ -130,6 +140,7 @@ def profile(request):
     profile = get_object_or_404(StudentProfile, user=request.user)
     if request.method == 'POST':
         form = ProfileForm(request.POST, request.FILES, instance=profile)
+        add_upload_errors(request, form)
         if form.is_valid():
             form.save()
             return redirect('student_portal:profile')
@@ -139,16 +150,16 @@ def profile(request):
 
 @login_required(login_url='/portal/login/')
 def courses(request):
-    profile = get_object_or_404(StudentProfile, user=request.user)
+    profile = request.student
     enrollments = Enrollment.objects.filter(student=profile)
         
     return render(request, 'student_portal/courses.html', {'enrollments': enrollments})
 
 @login_required(login_url='/portal/login/')
 def assignments(request):
-    profile = get_object_or_404(StudentProfile, user=request.user)
+    profile = request.student
     enrollments = Enrollment.objects.filter(student=profile)
-    current_semester = Semester.objects.filter(is_current=True).first()
+    current_semester = get_current_semester()
     
     # Get subjects for enrolled courses in current semester
     if current_semester:
@@ -157,11 +168,19 @@ def assignments(request):
             semester=current_semester,
             is_active=True
         ).values_list('subject_id', flat=True)
-        assignments = Assignment.objects.filter(subject_id__in=subject_ids).order_by('-due_date')
+        assignments = with_status(
+            Assignment.objects.filter(subject_id__in=subject_ids).select_related('subject'), profile
+        ).order_by('-due_date')
     else:
         assignments = Assignment.objects.none()
     
     if request.method == 'POST':
+        # Rejected mid-stream: the rest of the body was never read
+        rejected = upload_errors(request)
+        if rejected:
+            for error in rejected.values():
+                messages.error(request, error)
+            return redirect('student_portal:assignments')
         form = SubmissionForm(request.POST, request.FILES)
         if form.is_valid():
             submission = form.save(commit=False)
@@ -182,7 +201,7 @@ def download_pdf(request, assignment_id):
         return redirect('instructor_portal:assignments')
 
     # Generate correct raw resource URL
-    url, options = cloudinary_url(
+    url = get_media_storage().url(
         assignment.file_public_id,
         resource_type='raw',
         type='upload',
@@ -192,41 +211,39 @@ def download_pdf(request, assignment_id):
 @login_required(login_url='/portal/login/')
 def materials(request):
     from .models import Subject
-    profile = get_object_or_404(StudentProfile, user=request.user)
-    enrollments = Enrollment.objects.filter(student=profile)
-    current_semester = Semester.objects.filter(is_current=True).first()
+    profile = request.student
+    current_semester = get_current_semester()
     
-    selected_subject_id = request.GET.get('subject_id')
+    try:
+        selected_subject_id = int(request.GET.get('subject_id') or '')
+    except ValueError:
+        selected_subject_id = None
     
-    if not enrollments.exists() or not current_semester:
-        logger.warning(f"No enrollments or semester found for student {profile.user.username}")
+    if not current_semester:
+        logger.warning(f"No current semester for student {request.user.username}")
         subjects = []
-        materials = LearningMaterial.objects.none()
+        selected_subject_id = None
+        materials_by_type = list_materials([])
     else:
+        # Subqueries: the subject list is only queried when the template renders it
         subject_ids = CourseSubject.objects.filter(
-            course__in=enrollments.values_list('course', flat=True),
+            course__in=Enrollment.objects.filter(student=profile).values('course'),
             semester=current_semester,
             is_active=True
         ).values_list('subject_id', flat=True)
         
         subjects = Subject.objects.filter(id__in=subject_ids).distinct()
+        # Only the student's own subjects can be selected; anything else shows them all
+        if selected_subject_id is not None and not subject_ids.filter(subject_id=selected_subject_id).exists():
+            selected_subject_id = None
+        materials_by_type = list_materials([selected_subject_id] if selected_subject_id else subject_ids)
         
-        if selected_subject_id:
-            materials = LearningMaterial.objects.filter(subject_id=selected_subject_id).order_by('-created_at')
-        else:
-            materials = LearningMaterial.objects.filter(subject_id__in=subject_ids).order_by('-created_at')
-        
-        if not materials.exists():
-            logger.warning(f"No materials found for subjects {list(subject_ids)} for student {profile.user.username}")
+        if not any(materials_by_type.values()):
+            logger.warning(f"No materials found for student {request.user.username}")
 
-    materials_by_type = {
-        'outline': materials.filter(type='outline'),
-        'module': materials.filter(type='module'),
-        'video': materials.filter(type='video'),
-    }
     context = {
         'subjects': subjects,
-        'selected_subject_id': int(selected_subject_id) if selected_subject_id else None,
+        'selected_subject_id': selected_subject_id,
         'materials_by_type': materials_by_type,
         'meta_description': 'SIAT Student Portal - Access course outlines, modules, and videos for applied sciences technology Zambia/Kenya.',
     }
@@ -256,7 +273,7 @@ def subject_detail(request, pk):
     materials = LearningMaterial.objects.filter(subject=subject).order_by('-created_at')
 
     # Compute performance/progress for this subject for the logged-in student
-    profile = get_object_or_404(StudentProfile, user=request.user)
+    profile = request.student
     
     # Get student's subject enrollment
     subject_enrollment = SubjectEnrollment.objects.filter(
@@ -267,7 +284,8 @@ def subject_detail(request, pk):
     
     subj_avg_score = Submission.objects.filter(
         assignment__subject=subject,
-        student=profile
+        student=profile,
+        is_latest=True
     ).aggregate(avg=models.Avg('score'))['avg'] or 0
     
     subj_progress = subject_enrollment.progress if subject_enrollment else 0
@@ -284,7 +302,7 @@ def subject_detail(request, pk):
 
 @login_required(login_url='/portal/login/')
 def semester(request):
-    current_semester = Semester.objects.filter(is_current=True).first()
+    current_semester = get_current_semester()
     return render(request, 'student_portal/semester.html', {'semester': current_semester})
 
 class CourseDetailView(DetailView):
@@ -294,8 +312,8 @@ class CourseDetailView(DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        profile = StudentProfile.objects.get(user=self.request.user)
-        current_semester = Semester.objects.filter(is_current=True).first()
+        profile = self.request.student
+        current_semester = get_current_semester()
 
         if current_semester:
             course_subjects = CourseSubject.objects.filter(
@@ -306,18 +324,13 @@ class CourseDetailView(DetailView):
             
             # Get subjects for this course
             subject_ids = course_subjects.values_list('subject_id', flat=True)
-            materials = LearningMaterial.objects.filter(subject_id__in=subject_ids).order_by('-created_at')
+            materials_by_type = list_materials(subject_ids)
             assignments = Assignment.objects.filter(subject_id__in=subject_ids).order_by('-created_at')
         else:
             course_subjects = []
-            materials = LearningMaterial.objects.none()
+            materials_by_type = list_materials([])
             assignments = Assignment.objects.none()
         
-        materials_by_type = {
-            'outline': materials.filter(type='outline'),
-            'module': materials.filter(type='module'),
-            'video': materials.filter(type='video'),
-        }
         context['enrollment'] = Enrollment.objects.filter(student=profile, course=self.object).first()
         context['assignments'] = assignments
         context['course_subjects'] = course_subjects
@@ -331,7 +344,7 @@ class AssignmentDetailView(DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        profile = StudentProfile.objects.get(user=self.request.user)
+        profile = self.request.student
         context['submissions'] = Submission.objects.filter(assignment=self.object, student=profile).order_by('-submitted_at')
         return context
 
@@ -342,7 +355,7 @@ def student_logout(request):
 
 @login_required(login_url='/portal/login/')
 def get_notifications(request):
-    profile = get_object_or_404(StudentProfile, user=request.user)
+    profile = request.student
     notifications = Notification.objects.filter(student=profile)[:10]
     
     data = {
@@ -355,13 +368,13 @@ def get_notifications(request):
             'is_read': n.is_read,
             'created_at': n.created_at.strftime('%b %d, %Y %I:%M %p')
         } for n in notifications],
-        'unread_count': notifications.filter(is_read=False).count()
+        'unread_count': Notification.objects.filter(student=profile, is_read=False).count()
     }
     return JsonResponse(data)
 
 @login_required(login_url='/portal/login/')
 def mark_notification_read(request, notification_id):
-    profile = get_object_or_404(StudentProfile, user=request.user)
+    profile = request.student
     notification = get_object_or_404(Notification, id=notification_id, student=profile)
     notification.is_read = True
     notification.save()
@@ -369,6 +382,6 @@ def mark_notification_read(request, notification_id):
 
 @login_required(login_url='/portal/login/')
 def mark_all_notifications_read(request):
-    profile = get_object_or_404(StudentProfile, user=request.user)
+    profile = request.student
     Notification.objects.filter(student=profile, is_read=False).update(is_read=True)
     return JsonResponse({'success': True})
\ No newline at end of file
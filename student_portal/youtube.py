@@ -0,0 +1,68 @@
+"""
+YouTube link parsing.
+
+Video materials store the link an instructor pasted. parse_youtube_url()
+turns it into the 11-character video id and start offset once, when the
+material is saved (LearningMaterial.save), so pages only read the stored
+video_id and embed_url.
+"""
+import re
+from urllib.parse import urlsplit, parse_qs
+
+
+YOUTUBE_HOSTS = {'youtube.com', 'www.youtube.com', 'm.youtube.com', 'music.youtube.com'}
+SHORT_HOSTS = {'youtu.be', 'www.youtu.be'}
+# youtube.com/<prefix>/<id> forms
+PATH_PREFIXES = ('embed', 'shorts', 'live', 'v')
+
+VIDEO_ID_RE = re.compile(r'^[A-Za-z0-9_-]{11}$')
+TIMESTAMP_RE = re.compile(r'^(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s?)?$')
+
+EMBED_URL = 'https://www.youtube.com/embed/{video_id}'
+
+
+def parse_timestamp(value):
+    """Seconds for "90", "90s", "1m30s" or "1h2m3s"; 0 when unparseable."""
+    match = TIMESTAMP_RE.match(value.strip().lower()) if value else None
+    if not match:
+        return 0
+    hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def parse_youtube_url(url):
+    """
+    (video_id, start_seconds) for a YouTube watch, youtu.be, embed, shorts or
+    live link, or None if the URL is not a YouTube video link. Playlist and
+    tracking parameters are ignored.
+    """
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    if parts.scheme not in ('http', 'https'):
+        return None
+    host = (parts.hostname or '').lower()
+    segments = [segment for segment in parts.path.split('/') if segment]
+    query = parse_qs(parts.query)
+
+    if host in SHORT_HOSTS:
+        video_id = segments[0] if segments else ''
+    elif host in YOUTUBE_HOSTS:
+        if segments == ['watch']:
+            video_id = query.get('v', [''])[0]
+        elif len(segments) >= 2 and segments[0] in PATH_PREFIXES:
+            video_id = segments[1]
+        else:
+            return None
+    else:
+        return None
+
+    if not VIDEO_ID_RE.match(video_id):
+        return None
+    start = parse_timestamp(query.get('t', query.get('start', ['']))[0])
+    return video_id, start
+
+
+def embed_url(video_id, start=0):
+    url = EMBED_URL.format(video_id=video_id)
+    return f'{url}?start={start}' if start else url